@@ -7,9 +7,12 @@ human-readable output with color coding for threat levels.
 """
 
 import json
+import mmap
 import sys
 import argparse
 from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator
 from mathprotocol import registry
 
 
@@ -25,22 +28,43 @@ class Colors:
     BOLD = '\033[1m'
 
 
-def parse_log_line(line: str) -> str:
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+# Bursts of entries share a second, and the format has no sub-second field
+@lru_cache(maxsize=4096)
+def _format_second(second: int) -> str:
+    return datetime.fromtimestamp(second).strftime(TIMESTAMP_FORMAT)
+
+
+# Audit logs repeat a small set of codes; the registry does not change
+# while the viewer runs, so its lookups can be memoized
+@lru_cache(maxsize=256)
+def _task_name(prime: int) -> str:
+    return registry.get_task_name(prime)
+
+
+@lru_cache(maxsize=256)
+def _param_name(fib: int) -> str:
+    return registry.get_parameter_name(fib)
+
+
+def parse_log_line(entry: Dict[str, Any]) -> str:
     """
-    Parse a single log line and format it for display.
+    Format a single decoded log entry for display.
     
     Args:
-        line: JSON string from the audit log
+        entry: Log entry already decoded from the audit log
         
     Returns:
         Formatted string with decoded information and color coding
     """
     try:
-        entry = json.loads(line)
-        
         # Extract common fields
-        timestamp = entry.get('timestamp', 0)
-        dt = datetime.fromtimestamp(timestamp)
+        if 'timestamp_ns' in entry:
+            second = entry['timestamp_ns'] // 1_000_000_000
+        else:
+            second = int(entry.get('timestamp', 0))
         event = entry.get('event', 'UNKNOWN')
         threat_score = entry.get('threat_score', 0)
         
@@ -58,54 +82,94 @@ def parse_log_line(line: str) -> str:
             color = Colors.GREEN
             threat_label = "NORMAL"
         
-        # Build output
-        output = f"{Colors.BOLD}[{dt.strftime('%Y-%m-%d %H:%M:%S')}]{Colors.RESET} "
-        output += f"{color}{event}{Colors.RESET} "
-        output += f"(Threat: {color}{threat_label}{Colors.RESET})\n"
+        # Collect output parts and join once at the end
+        parts = [
+            f"{Colors.BOLD}[{_format_second(second)}]{Colors.RESET} "
+            f"{color}{event}{Colors.RESET} "
+            f"(Threat: {color}{threat_label}{Colors.RESET})\n"
+        ]
         
         # Decode task if present
         if 'task_prime' in entry:
             task_prime = entry['task_prime']
-            task_name = registry.get_task_name(task_prime)
-            output += f"  {Colors.CYAN}Task:{Colors.RESET} {task_prime} ({task_name})\n"
+            task_name = _task_name(task_prime)
+            parts.append(f"  {Colors.CYAN}Task:{Colors.RESET} {task_prime} ({task_name})\n")
         
         # Decode params if present
         if 'params_fib' in entry:
             params = entry['params_fib']
-            param_names = [f"{p}({registry.get_parameter_name(p)})" for p in params]
-            output += f"  {Colors.CYAN}Params:{Colors.RESET} {', '.join(param_names)}\n"
+            param_names = [f"{p}({_param_name(p)})" for p in params]
+            parts.append(f"  {Colors.CYAN}Params:{Colors.RESET} {', '.join(param_names)}\n")
         
         # Add client IP
         if 'client_ip' in entry:
-            output += f"  {Colors.CYAN}Client:{Colors.RESET} {entry['client_ip']}\n"
+            parts.append(f"  {Colors.CYAN}Client:{Colors.RESET} {entry['client_ip']}\n")
         
         # Add validation status
         if 'valid' in entry:
             valid_str = f"{Colors.GREEN}VALID{Colors.RESET}" if entry['valid'] else f"{Colors.RED}INVALID{Colors.RESET}"
-            output += f"  {Colors.CYAN}Validation:{Colors.RESET} {valid_str}\n"
+            parts.append(f"  {Colors.CYAN}Validation:{Colors.RESET} {valid_str}\n")
         
         # Add context sample if present
         if 'context_sample' in entry:
             sample = entry['context_sample']
-            output += f"  {Colors.CYAN}Context Sample:{Colors.RESET} {sample}...\n"
+            parts.append(f"  {Colors.CYAN}Context Sample:{Colors.RESET} {sample}...\n")
         
         # Add message if present
         if 'message' in entry:
-            output += f"  {Colors.CYAN}Message:{Colors.RESET} {entry['message']}\n"
+            parts.append(f"  {Colors.CYAN}Message:{Colors.RESET} {entry['message']}\n")
         
         # Add Merkle chain info
         merkle_hash = entry.get('merkle_hash', 'N/A')[:16]
         prev_hash = entry.get('prev_hash', 'N/A')[:16]
-        output += f"  {Colors.MAGENTA}Chain:{Colors.RESET} {merkle_hash}... <- {prev_hash}...\n"
+        parts.append(f"  {Colors.MAGENTA}Chain:{Colors.RESET} {merkle_hash}... <- {prev_hash}...\n")
         
-        return output
+        return "".join(parts)
         
-    except json.JSONDecodeError:
-        return f"{Colors.RED}[ERROR]{Colors.RESET} Could not parse line: {line[:50]}...\n"
     except Exception as e:
         return f"{Colors.RED}[ERROR]{Colors.RESET} {str(e)}\n"
 
 
+def iter_log_lines(path: str) -> Iterator[bytes]:
+    """
+    Yield the raw lines of a log file without decoding them.
+    
+    Regular files are memory-mapped and split with mmap.find (memchr),
+    avoiding the per-line read buffer copy and str decode of text-mode
+    iteration. Pipes and other unmappable files (e.g. /dev/stdin) fall
+    back to plain binary line iteration.
+    
+    Args:
+        path: Path to the JSONL audit log file
+        
+    Yields:
+        Each line as bytes, without its trailing newline
+    """
+    with open(path, 'rb') as f:
+        try:
+            # mmap cannot map an empty file
+            if f.seek(0, 2) == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Not seekable or not mappable; nothing has been read yet, but a
+            # successful seek must be undone
+            if f.seekable():
+                f.seek(0)
+            for line in f:
+                yield line[:-1] if line.endswith(b"\n") else line
+            return
+        with mm:
+            pos = 0
+            end = len(mm)
+            while pos < end:
+                nl = mm.find(b"\n", pos)
+                if nl == -1:
+                    nl = end
+                yield mm[pos:nl]
+                pos = nl + 1
+
+
 def main():
     """Main entry point for the audit viewer."""
     parser = argparse.ArgumentParser(
@@ -141,29 +205,30 @@ Examples:
         entry_count = 0
         displayed_count = 0
         
-        with open(args.logfile, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
+        for line in iter_log_lines(args.logfile):
+            line = line.strip()
+            if not line:
+                continue
+            
+            entry_count += 1
+            
+            # Parse JSON once, for both filtering and display
+            # (json.loads accepts the raw bytes directly)
+            try:
+                entry = json.loads(line)
+                threat_score = entry.get("threat_score", 0)
+                
+                # Apply filter if requested
+                if args.filter_threats and threat_score == 0:
                     continue
                 
-                entry_count += 1
+                # Display the entry
+                print(parse_log_line(entry))
+                displayed_count += 1
                 
-                # Parse JSON first for filtering
-                try:
-                    entry = json.loads(line)
-                    threat_score = entry.get("threat_score", 0)
-                    
-                    # Apply filter if requested
-                    if args.filter_threats and threat_score == 0:
-                        continue
-                    
-                    # Display the entry
-                    print(parse_log_line(line))
-                    displayed_count += 1
-                    
-                except json.JSONDecodeError:
-                    print(f"{Colors.RED}[ERROR]{Colors.RESET} Malformed entry at line {entry_count}\n")
+            except ValueError:
+                # JSONDecodeError, or UnicodeDecodeError from invalid bytes
+                print(f"{Colors.RED}[ERROR]{Colors.RESET} Malformed entry at line {entry_count}\n")
         
         # Print summary
         print(f"{Colors.BOLD}{'-' * 70}{Colors.RESET}")
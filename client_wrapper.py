@@ -1,4 +1,5 @@
-from typing import Optional, Dict, Any, Union
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple, Union
 from mathprotocol import MathProtocol
 
 class MathProtocolClient:
@@ -9,15 +10,20 @@ class MathProtocolClient:
     - OpenAI (client.chat.completions.create)
     - Anthropic (client.messages.create)
     """
-    def __init__(self, llm_client, model: str, system_prompt: str, provider: str = "openai"):
+    def __init__(self, llm_client, model: str, system_prompt: str, provider: str = "openai",
+                 async_client=None):
         """
         Args:
             llm_client: An initialized OpenAI or Anthropic client object.
             model (str): The model name (e.g., "gpt-4", "claude-3-opus").
             system_prompt (str): The full text from SYSTEM_PROMPT.md.
             provider (str): "openai" or "anthropic"
+            async_client: Optional AsyncOpenAI or AsyncAnthropic client used by
+                execute_async/execute_many. Without it, those run the sync
+                client in worker threads.
         """
         self.client = llm_client
+        self.async_client = async_client
         self.model = model
         self.system_prompt = system_prompt
         self.provider = provider.lower()
@@ -31,53 +37,152 @@ class MathProtocolClient:
             Dict containing parsed response codes and payload.
             Returns {'error': code} if validation fails.
         """
-        # 1. Construct Input
+        input_str, error = self._prepare_input(task_code, param_code, context)
+        if error:
+            return error
+
+        # 4. Call LLM
+        try:
+            raw_output = self._call_llm(input_str)
+        except Exception as e:
+            return {"error": 500, "message": f"LLM Provider Error: {str(e)}"}
+
+        return self._process_output(raw_output, task_code)
+
+    async def execute_async(self, task_code: int, param_code: int, context: str = "") -> Dict[str, Any]:
+        """
+        Async variant of execute(). Uses the async client when one was given.
+
+        Returns:
+            Same result dict as execute().
+        """
+        input_str, error = self._prepare_input(task_code, param_code, context)
+        if error:
+            return error
+        return await self._send_async(input_str, task_code)
+
+    async def _send_async(self, input_str: str, task_code: int) -> Dict[str, Any]:
+        """Send an already-validated input and process the output."""
+        try:
+            if self.async_client is not None:
+                raw_output = await self._call_llm_async(input_str)
+            else:
+                loop = asyncio.get_running_loop()
+                raw_output = await loop.run_in_executor(None, self._call_llm, input_str)
+        except Exception as e:
+            return {"error": 500, "message": f"LLM Provider Error: {str(e)}"}
+
+        return self._process_output(raw_output, task_code)
+
+    async def execute_many(self, requests: List[Tuple[int, int, str]],
+                           max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Execute several tasks concurrently, so N calls cost about one round trip.
+
+        Inputs are validated locally first; invalid ones never reach the provider.
+
+        Args:
+            requests: (task_code, param_code, context) tuples.
+            max_concurrency (int): Most provider calls in flight at once. Keep this
+                within the provider's requests-per-second and tokens-per-minute limits.
+
+        Returns:
+            One result dict per request, in request order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(input_str: str, task_code: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._send_async(input_str, task_code)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        pending = []
+        for i, (task_code, param_code, context) in enumerate(requests):
+            input_str, error = self._prepare_input(task_code, param_code, context)
+            if error:
+                results[i] = error
+            else:
+                pending.append((i, run(input_str, task_code)))
+
+        outputs = await asyncio.gather(*(coro for _, coro in pending))
+        for (i, _), output in zip(pending, outputs):
+            results[i] = output
+        return results
+
+    def _prepare_input(self, task_code: int, param_code: int,
+                       context: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Build and locally validate the input string. Returns (input_str, error)."""
+        invalid_input = {
+            "error": self.protocol.ERROR_INVALID_FORMAT,
+            "message": "Client-side input validation failed. Check Task (Prime) and Param (Fibonacci) codes."
+        }
+
+        # 1. Integer Pre-check (reject bad codes before any string work)
+        if (task_code not in self.protocol.TASKS
+                or task_code not in self.protocol.PRIMES
+                or param_code not in self.protocol.FIBONACCI):
+            return "", invalid_input
+
+        # 2. Construct Input
         # Only add the pipe if context exists
         separator = " | " if context else ""
         input_str = f"{task_code}-{param_code}{separator}{context}"
 
-        # 2. Local Validation (Save API tokens/money on bad input)
+        # 3. Local Validation (Save API tokens/money on bad input)
         if not self.protocol.validate_input(input_str):
-            return {
-                "error": self.protocol.ERROR_INVALID_FORMAT, 
-                "message": "Client-side input validation failed. Check Task (Prime) and Param (Fibonacci) codes."
-            }
+            return input_str, invalid_input
 
-        # 3. Call LLM
-        raw_output = ""
-        try:
-            if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": input_str}
-                    ],
-                    temperature=0  # Deterministic behavior is key!
-                )
-                raw_output = response.choices[0].message.content
-            
-            elif self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1024,
-                    system=self.system_prompt,
-                    messages=[
-                        {"role": "user", "content": input_str}
-                    ],
-                    temperature=0
-                )
-                raw_output = response.content[0].text
-        
-        except Exception as e:
-            return {"error": 500, "message": f"LLM Provider Error: {str(e)}"}
+        return input_str, None
+
+    def _request_kwargs(self, input_str: str) -> Dict[str, Any]:
+        """Provider-specific request arguments, shared by sync and async calls."""
+        if self.provider == "openai":
+            return dict(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": input_str}
+                ],
+                temperature=0  # Deterministic behavior is key!
+            )
+        return dict(
+            model=self.model,
+            max_tokens=1024,
+            system=self.system_prompt,
+            messages=[
+                {"role": "user", "content": input_str}
+            ],
+            temperature=0
+        )
+
+    def _call_llm(self, input_str: str) -> str:
+        """Call the sync provider client and return the raw text output."""
+        if self.provider == "openai":
+            response = self.client.chat.completions.create(**self._request_kwargs(input_str))
+            return response.choices[0].message.content
+        elif self.provider == "anthropic":
+            response = self.client.messages.create(**self._request_kwargs(input_str))
+            return response.content[0].text
+        return ""
+
+    async def _call_llm_async(self, input_str: str) -> str:
+        """Call the async provider client and return the raw text output."""
+        if self.provider == "openai":
+            response = await self.async_client.chat.completions.create(**self._request_kwargs(input_str))
+            return response.choices[0].message.content
+        elif self.provider == "anthropic":
+            response = await self.async_client.messages.create(**self._request_kwargs(input_str))
+            return response.content[0].text
+        return ""
 
-        # 4. Validate & Parse Response
+    def _process_output(self, raw_output: str, task_code: int) -> Dict[str, Any]:
+        """Validate and parse the raw LLM output."""
+        # 5. Validate & Parse Response
         if not self.protocol.validate_response(raw_output, task_code):
             return {
-                "error": 4096, 
-                "raw_response": raw_output, 
+                "error": 4096,
+                "raw_response": raw_output,
                 "message": "LLM violated protocol (Invalid response format or codes)"
             }
 
-        return self.protocol.parse_response(raw_output)
\ No newline at end of file
+        return self.protocol.parse_response(raw_output)
@@ -7,6 +7,22 @@ This file demonstrates various use cases of the MathProtocol system.
 from mathprotocol import MathProtocol, MockLLM
 
 
+# Response code interpretations, built once rather than per loop iteration
+SENTIMENT_MAP = {2: "Positive", 4: "Negative", 8: "Neutral"}
+CONFIDENCE_MAP = {128: "High", 256: "Medium", 512: "Low"}
+LANG_MAP = {16: "English", 32: "Spanish", 64: "French"}
+
+
+def base_codes(codes):
+    """Return the response codes as a set with the v2.1 Success Bit cleared."""
+    return {code & ~1 for code in codes}
+
+
+def lookup(code_map, codes):
+    """Return the label of the first code in code_map present in codes."""
+    return next((label for code, label in code_map.items() if code in codes), "Unknown")
+
+
 def main():
     """Run example demonstrations of MathProtocol."""
     
@@ -31,17 +47,9 @@ def main():
         parsed = protocol.parse_response(response)
         
         # Interpret the response
-        sentiment_map = {2: "Positive", 4: "Negative", 8: "Neutral"}
-        confidence_map = {128: "High", 256: "Medium", 512: "Low"}
-        
-        sentiment = "Unknown"
-        confidence = "Unknown"
-        
-        for code in parsed['codes']:
-            if code in sentiment_map:
-                sentiment = sentiment_map[code]
-            elif code in confidence_map:
-                confidence = confidence_map[code]
+        codes = base_codes(parsed['codes'])
+        sentiment = lookup(SENTIMENT_MAP, codes)
+        confidence = lookup(CONFIDENCE_MAP, codes)
         
         print(f"Input:  {input_str}")
         print(f"Output: {response}")
@@ -80,13 +88,7 @@ def main():
         parsed = protocol.parse_response(response)
         
         # Interpret language
-        lang_map = {16: "English", 32: "Spanish", 64: "French"}
-        language = "Unknown"
-        
-        for code in parsed['codes']:
-            if code in lang_map:
-                language = lang_map[code]
-                break
+        language = lookup(LANG_MAP, base_codes(parsed['codes']))
         
         print(f"Input:  {input_str}")
         print(f"Output: {response}")
@@ -119,14 +121,15 @@ def main():
         ("Hello there", "Invalid Format (doesn't match pattern)")
     ]
     
+    error_map = {
+        protocol.ERROR_INVALID_TASK_STR: "Invalid Task Code",
+        protocol.ERROR_INVALID_PARAM_STR: "Invalid Parameter Code",
+        protocol.ERROR_INVALID_FORMAT_STR: "Invalid Format",
+    }
+    
     for input_str, description in error_inputs:
         response = mock_llm.process(input_str)
         
-        error_map = {
-            str(protocol.ERROR_INVALID_TASK): "Invalid Task Code",
-            str(protocol.ERROR_INVALID_PARAM): "Invalid Parameter Code",
-            str(protocol.ERROR_INVALID_FORMAT): "Invalid Format",
-        }
         error_msg = error_map.get(response, "Unknown Error")
         
         print(f"Input:  {input_str}")
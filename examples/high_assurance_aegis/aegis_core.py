@@ -10,15 +10,56 @@ This module implements four critical security components:
 All components are production-ready and thread-safe.
 """
 
+import os
 import re
 import json
 import hashlib
+import hmac
 import time
-from typing import Dict, List, Optional, Any, Tuple
+import atexit
+import logging
+from typing import Callable, Deque, Dict, List, Optional, Any, Tuple
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
 from threading import Lock
 import traceback
+import queue
+from threading import Thread
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Optional linear-time regex engine for PHI scanning
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Module logger for background-writer failures
+logger = logging.getLogger(__name__)
+
+
+# Last (second, "YYYY-MM-DDTHH:MM:SS") pair; replaced as a whole, so
+# concurrent readers never see a mismatched second and prefix
+_iso_second_cache: Tuple[int, str] = (-1, "")
+
+
+def _utc_timestamp() -> str:
+    """
+    Current UTC time in ISO 8601 with microseconds, e.g.
+    2024-01-01T12:00:00.000123+00:00.
+    
+    The date/time prefix is formatted once per second; only the
+    sub-second part is formatted per call.
+    """
+    global _iso_second_cache
+    second, ns = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _iso_second_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _iso_second_cache = (second, prefix)
+    return f"{prefix}.{ns // 1000:06d}+00:00"
 
 
 class DataAirlock:
@@ -41,6 +82,16 @@ class DataAirlock:
         'CREDIT_CARD': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
     }
     
+    # All patterns in one alternation of named groups: a single scan of the
+    # text, with m.lastgroup naming the pattern that matched. Uses RE2
+    # (DFA, immune to catastrophic backtracking) when installed.
+    _COMBINED = (re2 if RE2_AVAILABLE else re).compile(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern in PATTERNS.items())
+    )
+    
+    # Any token redact() can emit, e.g. <EMAIL_3>
+    _TOKEN_PATTERN = re.compile(r"<(?:%s)_\d+>" % "|".join(PATTERNS))
+    
     def __init__(self):
         self.vault: Dict[str, str] = {}  # Token -> Original Value
         self.counter: Dict[str, int] = {}  # Pattern -> Counter
@@ -57,27 +108,47 @@ class DataAirlock:
             Tuple of (redacted_text, token_map)
         """
         with self.lock:
-            redacted = text
-            token_map = {}
-            
-            for pattern_name, pattern in self.PATTERNS.items():
-                matches = re.findall(pattern, text)
-                for match in matches:
-                    # Generate deterministic token
-                    if pattern_name not in self.counter:
-                        self.counter[pattern_name] = 0
-                    self.counter[pattern_name] += 1
-                    
-                    token = f"<{pattern_name}_{self.counter[pattern_name]}>"
-                    
-                    # Store mapping
-                    self.vault[token] = match
-                    token_map[token] = match
-                    
-                    # Replace in text
-                    redacted = redacted.replace(match, token)
+            return self._redact(text)
+    
+    def redact_batch(self, texts: List[str]) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Redact many texts under a single lock acquisition.
+        
+        Args:
+            texts: Input texts that may contain PHI/PII
             
-            return redacted, token_map
+        Returns:
+            One (redacted_text, token_map) tuple per input, in order
+        """
+        with self.lock:
+            redact = self._redact
+            return [redact(text) for text in texts]
+    
+    def _redact(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Redact one text. Caller must hold self.lock."""
+        token_map: Dict[str, str] = {}
+        seen: Dict[str, str] = {}  # Original Value -> Token (this call)
+        counter = self.counter
+        vault = self.vault
+        
+        def tokenize(match) -> str:
+            value = match.group()
+            token = seen.get(value)
+            if token is None:
+                # Generate deterministic token
+                pattern_name = match.lastgroup
+                count = counter.get(pattern_name, 0) + 1
+                counter[pattern_name] = count
+                token = f"<{pattern_name}_{count}>"
+                
+                # Store mapping
+                vault[token] = value
+                token_map[token] = value
+                seen[value] = token
+            return token
+        
+        redacted = self._COMBINED.sub(tokenize, text)
+        return redacted, token_map
     
     def rehydrate(self, text: str, token_map: Optional[Dict[str, str]] = None) -> str:
         """
@@ -90,14 +161,23 @@ class DataAirlock:
         Returns:
             Original text with sensitive data restored
         """
+        if '<' not in text:
+            return text  # No tokens to restore
+        
+        # A caller's token map is private to its request; only the shared
+        # vault needs the lock
+        if token_map is not None:
+            return self._rehydrate(text, token_map)
         with self.lock:
-            rehydrated = text
-            tokens = token_map if token_map is not None else self.vault
-            
-            for token, original in tokens.items():
-                rehydrated = rehydrated.replace(token, original)
-            
-            return rehydrated
+            return self._rehydrate(text, self.vault)
+    
+    def _rehydrate(self, text: str, tokens: Dict[str, str]) -> str:
+        """One pass over the text; unknown tokens are left as they are."""
+        if not tokens:
+            return text
+        return self._TOKEN_PATTERN.sub(
+            lambda m: tokens.get(m.group(), m.group()), text
+        )
     
     def clear_vault(self):
         """Clear the vault (for testing or periodic cleanup)."""
@@ -117,22 +197,44 @@ class MerkleAuditChain:
     Security Control: NIST AU-9 (Audit Log Protection)
     """
     
-    def __init__(self, log_dir: str = "./audit_logs", batch_size: int = 10):
+    # Canonical event encoding for leaf hashes: sorted keys, no whitespace.
+    # Built once so each call goes straight to the C encoder.
+    _canonical = json.JSONEncoder(sort_keys=True, separators=(",", ":")).encode
+    _encode_entry = json.JSONEncoder(separators=(",", ":")).encode
+    
+    # Largest batch_size given a generated straight-line root function
+    UNROLL_LIMIT = 1024
+    
+    # Root scheme written into each batch entry's "format" field. Entries
+    # without one predate it (format 1) and are verified the legacy way.
+    FORMAT_VERSION = 2
+    
+    def __init__(self, log_dir: str = "./audit_logs", batch_size: int = 10,
+                 max_latency: Optional[float] = None):
         """
         Initialize Merkle Audit Chain.
         
         Args:
             log_dir: Directory for audit log files
             batch_size: Number of events before batch write
+            max_latency: Seconds an event may wait in a partial batch before
+                flush_due() writes it. None batches by count only.
         """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True, parents=True)
         
         self.batch_size = batch_size
-        self.buffer: List[Dict[str, Any]] = []
+        self.max_latency = max_latency
+        # Monotonic time by which the buffered events must be written
+        self._batch_deadline: Optional[float] = None
+        # deque.append is atomic, so producers never take a lock; self.lock
+        # only serializes flushers and the chain state they update
+        self.buffer: Deque[Dict[str, Any]] = deque()
         self.previous_root = "GENESIS"
         self.chain_file = self.log_dir / "merkle_chain.jsonl"
         self.lock = Lock()
+        # Last verify_chain result and its monotonic time, for max_age callers
+        self._verified: Optional[Tuple[float, bool]] = None
         
         # Load previous root if exists
         if self.chain_file.exists():
@@ -141,6 +243,20 @@ class MerkleAuditChain:
                 if lines:
                     last_entry = json.loads(lines[-1])
                     self.previous_root = last_entry.get('merkle_root', 'GENESIS')
+        
+        # Persistent append-only descriptor: one write syscall per batch,
+        # synced to disk before it returns (O_DSYNC where supported)
+        self._fd: Optional[int] = os.open(
+            self.chain_file,
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_DSYNC", 0),
+            0o644,
+        )
+        
+        # Full batches always have batch_size leaves, so their tree shape
+        # is fixed and can be hashed without loops or parity checks
+        self._full_batch_root: Optional[Callable[[List[Dict[str, Any]]], bytes]] = (
+            self._unrolled_merkle(batch_size) if 0 < batch_size <= self.UNROLL_LIMIT else None
+        )
     
     def log_event(self, event_type: str, data: Dict[str, Any]):
         """
@@ -150,17 +266,19 @@ class MerkleAuditChain:
             event_type: Type of event (e.g., "REQUEST", "RESPONSE", "ERROR")
             data: Event data
         """
-        with self.lock:
-            event = {
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'event_type': event_type,
-                'data': data
-            }
-            self.buffer.append(event)
-            
-            # Flush if buffer is full
-            if len(self.buffer) >= self.batch_size:
-                self._flush()
+        self.buffer.append({
+            'timestamp': _utc_timestamp(),
+            'event_type': event_type,
+            'data': data
+        })
+        if self._batch_deadline is None and self.max_latency is not None:
+            self._batch_deadline = time.monotonic() + self.max_latency
+        
+        # Flush if buffer is full
+        if len(self.buffer) >= self.batch_size:
+            with self.lock:
+                if len(self.buffer) >= self.batch_size:
+                    self._flush(self.batch_size)
     
     def _compute_merkle_root(self, events: List[Dict[str, Any]]) -> str:
         """
@@ -172,35 +290,141 @@ class MerkleAuditChain:
         Returns:
             Merkle root hash (hex string)
         """
+        return self._merkle_digest(events).hex()
+    
+    @staticmethod
+    def _merkle_digest(events: List[Dict[str, Any]]) -> bytes:
+        """
+        Compute the raw 32-byte Merkle root of an event list.
+        
+        Nodes are kept as raw digests; hex encoding happens only when the
+        root is written out.
+        """
+        sha256 = hashlib.sha256
+        if not events:
+            return sha256(b"EMPTY").digest()
+        
+        # Hash each event into one preallocated buffer of 32-byte slots
+        count = len(events)
+        buf = bytearray(count * 32)
+        canonical = MerkleAuditChain._canonical
+        for i, event in enumerate(events):
+            buf[i * 32:(i + 1) * 32] = sha256(canonical(event).encode()).digest()
+        
+        # Build Merkle tree in place; each parent overwrites slots that
+        # have already been consumed
+        view = memoryview(buf)
+        while count > 1:
+            pairs = count // 2
+            for i in range(pairs):
+                buf[i * 32:(i + 1) * 32] = sha256(view[i * 64:(i + 1) * 64]).digest()
+            if count % 2 == 1:
+                # Odd node pairs with itself, hashed straight from its slot
+                last = view[(count - 1) * 32:count * 32]
+                node = sha256(last)
+                node.update(last)
+                buf[pairs * 32:(pairs + 1) * 32] = node.digest()
+            count = (count + 1) // 2
+        
+        return bytes(view[:32])
+    
+    @staticmethod
+    def _legacy_merkle_digest(events: List[Dict[str, Any]]) -> bytes:
+        """
+        Compute the raw Merkle root of a format 1 entry.
+        
+        Format 1 hashed json.dumps(sort_keys=True) leaves and paired nodes
+        as concatenated hex strings.
+        """
+        sha256 = hashlib.sha256
         if not events:
-            return hashlib.sha256(b"EMPTY").hexdigest()
+            return sha256(b"EMPTY").digest()
         
-        # Hash each event
         hashes = [
-            hashlib.sha256(json.dumps(event, sort_keys=True).encode()).hexdigest()
+            sha256(json.dumps(event, sort_keys=True).encode()).hexdigest()
             for event in events
         ]
-        
-        # Build Merkle tree
         while len(hashes) > 1:
             if len(hashes) % 2 == 1:
-                hashes.append(hashes[-1])  # Duplicate last hash if odd
-            
-            next_level = []
-            for i in range(0, len(hashes), 2):
-                combined = hashes[i] + hashes[i + 1]
-                next_level.append(hashlib.sha256(combined.encode()).hexdigest())
-            hashes = next_level
+                hashes.append(hashes[-1])
+            hashes = [
+                sha256((left + right).encode()).hexdigest()
+                for left, right in zip(hashes[0::2], hashes[1::2])
+            ]
         
-        return hashes[0]
+        return bytes.fromhex(hashes[0])
     
-    def _flush(self):
-        """Flush buffer to disk with Merkle root chaining."""
-        if not self.buffer:
+    @staticmethod
+    def _entry_digest(events: List[Dict[str, Any]], version: int) -> Optional[bytes]:
+        """
+        Recompute a batch's Merkle root with the scheme its entry declares.
+        
+        Returns:
+            Raw root digest, or None for an unknown format
+        """
+        if version == MerkleAuditChain.FORMAT_VERSION:
+            return MerkleAuditChain._merkle_digest(events)
+        if version == 1:
+            return MerkleAuditChain._legacy_merkle_digest(events)
+        return None
+    
+    @staticmethod
+    def _unrolled_merkle(size: int) -> Callable[[List[Dict[str, Any]]], bytes]:
+        """
+        Generate a loop-free Merkle root function for exactly `size` events.
+        
+        Produces the same root as _merkle_digest: one hash statement per
+        node, with the odd node of a level paired with itself.
+        """
+        lines = ["def root(events, _sha=_sha, _encode=_encode):"]
+        level = [f"h{i}" for i in range(size)]
+        lines += [f"    h{i} = _sha(_encode(events[{i}]).encode()).digest()" for i in range(size)]
+        depth = 0
+        while len(level) > 1:
+            parents = []
+            for i in range(0, len(level), 2):
+                left = level[i]
+                right = level[i + 1] if i + 1 < len(level) else left
+                name = f"n{depth}_{i // 2}"
+                lines.append(f"    {name} = _sha({left} + {right}).digest()")
+                parents.append(name)
+            level = parents
+            depth += 1
+        lines.append(f"    return {level[0]}")
+        
+        namespace = {'_sha': hashlib.sha256, '_encode': MerkleAuditChain._canonical}
+        exec(compile("\n".join(lines), f"<merkle_root_{size}>", "exec"), namespace)
+        return namespace['root']
+    
+    def _flush(self, limit: Optional[int] = None):
+        """
+        Flush buffer to disk with Merkle root chaining. Caller must hold
+        self.lock.
+        
+        Args:
+            limit: Most events to take from the buffer (all if None)
+        
+        Raises:
+            ValueError: If close() has already been called
+        """
+        if self._fd is None:
+            raise ValueError("audit chain is closed")
+        buffer = self.buffer
+        count = len(buffer) if limit is None else min(limit, len(buffer))
+        if not count:
             return
+        popleft = buffer.popleft
+        events = [popleft() for _ in range(count)]
+        # Events left behind (or appended meanwhile) start a new deadline
+        self._batch_deadline = (
+            time.monotonic() + self.max_latency if buffer and self.max_latency is not None else None
+        )
         
         # Compute Merkle root
-        merkle_root = self._compute_merkle_root(self.buffer)
+        if count == self.batch_size and self._full_batch_root is not None:
+            merkle_root = self._full_batch_root(events).hex()
+        else:
+            merkle_root = self._compute_merkle_root(events)
         
         # Chain to previous root
         chain_hash = hashlib.sha256(
@@ -209,68 +433,144 @@ class MerkleAuditChain:
         
         # Create batch entry
         batch_entry = {
+            'format': self.FORMAT_VERSION,
             'batch_id': int(time.time() * 1000),
             'previous_root': self.previous_root,
             'merkle_root': merkle_root,
             'chain_hash': chain_hash,
-            'event_count': len(self.buffer),
-            'events': self.buffer.copy(),
-            'timestamp': datetime.now(timezone.utc).isoformat()
+            'event_count': count,
+            'events': events,
+            'timestamp': _utc_timestamp()
         }
         
         # Write to chain file
-        with open(self.chain_file, 'a') as f:
-            f.write(json.dumps(batch_entry) + '\n')
+        payload = memoryview((self._encode_entry(batch_entry) + '\n').encode())
+        while payload:
+            payload = payload[os.write(self._fd, payload):]
         
-        # Update state
+        # Update state; a new batch makes any cached verification stale
         self.previous_root = merkle_root
-        self.buffer.clear()
+        self._verified = None
+    
+    def due_in(self) -> Optional[float]:
+        """
+        Seconds until buffered events reach max_latency (<= 0 if overdue).
+        
+        Returns:
+            None if nothing is waiting on a deadline
+        """
+        deadline = self._batch_deadline
+        return None if deadline is None else deadline - time.monotonic()
+    
+    def flush_due(self):
+        """Write the buffer if its deadline has passed (for a periodic flusher)."""
+        remaining = self.due_in()
+        if remaining is None or remaining > 0:
+            return
+        with self.lock:
+            if self._fd is not None:
+                self._flush()
     
     def force_flush(self):
         """Force flush buffer (for shutdown or testing)."""
         with self.lock:
             self._flush()
     
-    def verify_chain(self) -> bool:
+    def close(self):
+        """Flush any buffered events and close the chain file."""
+        with self.lock:
+            if self._fd is None:
+                return
+            self._flush()
+            os.close(self._fd)
+            self._fd = None
+    
+    def __del__(self):
+        fd = getattr(self, "_fd", None)
+        if fd is not None:
+            os.close(fd)
+    
+    def verify_chain(self, workers: int = 1, max_age: float = 0.0) -> bool:
         """
         Verify integrity of the entire chain.
         
+        Args:
+            workers: Processes used to recompute Merkle roots. Roots of
+                different batches are independent, so large archives
+                verify in parallel; the link checks stay sequential.
+            max_age: Seconds a previous result may be reused for, as long
+                as no batch has been written since. 0 always re-verifies.
+        
         Returns:
             True if chain is intact, False if tampered
         """
+        verified = self._verified
+        if verified is not None and time.monotonic() - verified[0] < max_age:
+            return verified[1]
+        
+        checked_at = time.monotonic()
+        valid = self._verify_file(workers)
+        self._verified = (checked_at, valid)
+        return valid
+    
+    def _verify_file(self, workers: int) -> bool:
+        """Walk the chain file and check every link and root."""
         if not self.chain_file.exists():
             return True  # No chain yet
         
+        # Stream the file; only the previous root is carried between entries
+        prev_root = "GENESIS"
         with open(self.chain_file, 'r') as f:
-            entries = [json.loads(line) for line in f]
+            for entry, digest in self._digest_entries(map(json.loads, f), workers):
+                # Verify link to the previous batch
+                if entry['previous_root'] != prev_root:
+                    return False
+                
+                # Compare recomputed Merkle root and chain hash as raw
+                # digests, in constant time
+                try:
+                    stored_root = bytes.fromhex(entry['merkle_root'])
+                    stored_chain = bytes.fromhex(entry['chain_hash'])
+                except ValueError:
+                    return False
+                if digest is None or not hmac.compare_digest(digest, stored_root):
+                    return False
+                
+                expected_chain = hashlib.sha256(
+                    (prev_root + entry['merkle_root']).encode()
+                ).digest()
+                if not hmac.compare_digest(expected_chain, stored_chain):
+                    return False
+                
+                prev_root = entry['merkle_root']
         
-        if not entries:
-            return True
+        return True
+    
+    def _digest_entries(self, entries, workers: int):
+        """
+        Yield (entry, recomputed Merkle root) pairs in file order.
         
-        # Verify each link
-        for i, entry in enumerate(entries):
-            # Recompute Merkle root
-            computed_root = self._compute_merkle_root(entry['events'])
-            if computed_root != entry['merkle_root']:
-                return False
-            
-            # Verify chain hash
-            if i == 0:
-                expected_prev = "GENESIS"
-            else:
-                expected_prev = entries[i - 1]['merkle_root']
-            
-            if entry['previous_root'] != expected_prev:
-                return False
-            
-            # Verify chain hash computation
-            expected_chain = hashlib.sha256(
-                (entry['previous_root'] + entry['merkle_root']).encode()
-            ).hexdigest()
-            if entry['chain_hash'] != expected_chain:
-                return False
+        Each root is recomputed with the scheme named by the entry's
+        "format" field (None if unknown). With workers > 1, entries are
+        read in bounded windows and their roots computed across a process
+        pool.
+        """
+        if workers <= 1:
+            for entry in entries:
+                yield entry, self._entry_digest(entry['events'], entry.get('format', 1))
+            return
         
-        return True
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                window = list(islice(entries, workers * 4))
+                if not window:
+                    return
+                digests = pool.map(
+                    self._entry_digest,
+                    [entry['events'] for entry in window],
+                    [entry.get('format', 1) for entry in window],
+                )
+                yield from zip(window, digests)
 
 
 class CircuitBreaker:
@@ -295,7 +595,8 @@ class CircuitBreaker:
         self.timeout = timeout
         
         self.failure_count = 0
-        self.last_failure_time = 0
+        self.last_failure_time = 0  # Wall clock, for reporting
+        self._last_failure_monotonic = 0.0  # For the reset timeout
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
         self.lock = Lock()
     
@@ -313,23 +614,26 @@ class CircuitBreaker:
         Raises:
             Exception: If circuit is OPEN or function fails
         """
-        with self.lock:
-            # Check if circuit is OPEN
-            if self.state == "OPEN":
-                # Check if timeout has passed
-                if time.time() - self.last_failure_time > self.timeout:
-                    self.state = "HALF_OPEN"
-                else:
-                    raise Exception("Circuit breaker is OPEN - Service unavailable")
+        # CLOSED fast path: a single attribute read, no lock
+        if self.state != "CLOSED":
+            with self.lock:
+                # Check if circuit is OPEN
+                if self.state == "OPEN":
+                    # Check if timeout has passed (monotonic, immune to clock steps)
+                    if time.monotonic() - self._last_failure_monotonic > self.timeout:
+                        self.state = "HALF_OPEN"
+                    else:
+                        raise Exception("Circuit breaker is OPEN - Service unavailable")
         
         try:
             result = func(*args, **kwargs)
             
             # Success - reset if in HALF_OPEN
-            with self.lock:
-                if self.state == "HALF_OPEN":
-                    self.state = "CLOSED"
-                    self.failure_count = 0
+            if self.state == "HALF_OPEN":
+                with self.lock:
+                    if self.state == "HALF_OPEN":
+                        self.state = "CLOSED"
+                        self.failure_count = 0
             
             return result
             
@@ -337,6 +641,7 @@ class CircuitBreaker:
             with self.lock:
                 self.failure_count += 1
                 self.last_failure_time = time.time()
+                self._last_failure_monotonic = time.monotonic()
                 
                 if self.failure_count >= self.failure_threshold:
                     self.state = "OPEN"
@@ -349,6 +654,7 @@ class CircuitBreaker:
             self.state = "CLOSED"
             self.failure_count = 0
             self.last_failure_time = 0
+            self._last_failure_monotonic = 0.0
     
     def get_state(self) -> Dict[str, Any]:
         """Get current circuit breaker state."""
@@ -370,6 +676,10 @@ class DeadLetterVault:
     Security Control: NIST AU-11 (Audit Record Retention)
     """
     
+    # Records are encoded once, compactly, and written with a single call
+    _encode = json.JSONEncoder(separators=(",", ":")).encode
+    _STOP = object()
+    
     def __init__(self, vault_dir: str = "./dead_letter_vault"):
         """
         Initialize Dead Letter Vault.
@@ -380,34 +690,88 @@ class DeadLetterVault:
         self.vault_dir = Path(vault_dir)
         self.vault_dir.mkdir(exist_ok=True, parents=True)
         self.lock = Lock()
+        
+        # Disk writes happen on a background thread so a failure storm
+        # doesn't serialize request handlers on file I/O
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = Thread(target=self._write_letters, name="dead-letter-writer", daemon=True)
+        self._writer.start()
+        # Queued letters would be lost with the daemon thread at exit
+        atexit.register(self.close)
     
     def store(self, request_data: Dict[str, Any], error: Exception):
         """
         Store failed transaction with full context.
         
+        The record is queued and written by the background writer; call
+        flush() to wait for it to reach disk.
+        
         Args:
             request_data: Original request data
             error: Exception that caused failure
+        
+        Raises:
+            ValueError: If close() has already been called
         """
-        with self.lock:
-            timestamp = datetime.now(timezone.utc).isoformat().replace(':', '-')
-            filename = f"dead_letter_{timestamp}_{id(request_data)}.json"
-            filepath = self.vault_dir / filename
-            
-            # Capture full error context
-            dead_letter = {
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'request': request_data,
-                'error': {
-                    'type': type(error).__name__,
-                    'message': str(error),
-                    'traceback': traceback.format_exc()
-                }
+        timestamp = _utc_timestamp()
+        filename = f"dead_letter_{timestamp.replace(':', '-')}_{id(request_data)}.json"
+        
+        # Capture full error context
+        dead_letter = {
+            'timestamp': timestamp,
+            'request': request_data,
+            'error': {
+                'type': type(error).__name__,
+                'message': str(error),
+                'traceback': ''.join(
+                    traceback.format_exception(type(error), error, error.__traceback__)
+                )
             }
-            
-            # Write to vault
-            with open(filepath, 'w') as f:
-                json.dump(dead_letter, f, indent=2)
+        }
+        
+        # Encode now so later mutation of request_data can't change the record
+        item = (self.vault_dir / filename, self._encode(dead_letter).encode())
+        # Checked under the lock so nothing is queued behind close()'s stop marker
+        with self.lock:
+            if self._closed:
+                raise ValueError("dead letter vault is closed")
+            self._queue.put_nowait(item)
+    
+    def _write_letters(self):
+        """Background writer: one open/write/close per dead letter."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                filepath, payload = item
+                fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_DSYNC", 0), 0o644)
+                try:
+                    view = memoryview(payload)
+                    while view:
+                        view = view[os.write(fd, view):]
+                finally:
+                    os.close(fd)
+            except Exception:
+                # Keep draining: a dead writer would hang every flush()
+                logger.exception("Dead letter write failed: %s", item[0])
+            finally:
+                self._queue.task_done()
+    
+    def flush(self):
+        """Block until every queued dead letter has been written."""
+        if self._writer.is_alive():
+            self._queue.join()
+    
+    def close(self):
+        """Write any queued dead letters and stop the background writer."""
+        with self.lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(self._STOP)
+        self._writer.join()
+        atexit.unregister(self.close)
     
     def list_failed(self) -> List[str]:
         """
@@ -416,7 +780,14 @@ class DeadLetterVault:
         Returns:
             List of dead letter file paths
         """
-        return [str(f) for f in self.vault_dir.glob("dead_letter_*.json")]
+        self.flush()
+        with os.scandir(self.vault_dir) as entries:
+            return [entry.path for entry in entries if self._is_dead_letter(entry.name)]
+    
+    @staticmethod
+    def _is_dead_letter(name: str) -> bool:
+        """Whether a vault directory entry is a dead letter file."""
+        return name.startswith("dead_letter_") and name.endswith(".json")
     
     def load(self, filepath: str) -> Dict[str, Any]:
         """
@@ -433,9 +804,11 @@ class DeadLetterVault:
     
     def clear_vault(self):
         """Clear all dead letters (for testing)."""
-        with self.lock:
-            for file in self.vault_dir.glob("dead_letter_*.json"):
-                file.unlink()
+        self.flush()
+        with self.lock, os.scandir(self.vault_dir) as entries:
+            for entry in entries:
+                if self._is_dead_letter(entry.name):
+                    os.unlink(entry.path)
 
 
 # Security Validation Functions
@@ -480,10 +853,11 @@ def validate_aegis_security():
     for i in range(5):
         audit.log_event("TEST", {"index": i, "data": f"Event {i}"})
     
-    audit.force_flush()
+    audit.close()
     
     is_valid = audit.verify_chain()
     assert is_valid, "Merkle chain verification failed!"
+    assert audit.verify_chain(workers=2), "Parallel Merkle verification failed!"
     print("✓ PASS: Merkle chain integrity verified")
     
     # Test 4: Circuit Breaker
@@ -516,6 +890,8 @@ def validate_aegis_security():
     
     failed = vault.list_failed()
     assert len(failed) > 0, "Dead letter not stored!"
+    assert vault.load(failed[0])['request'] == request, "Dead letter corrupted!"
+    vault.close()
     print(f"Stored {len(failed)} dead letter(s)")
     print("✓ PASS: Dead letter stored successfully")
     
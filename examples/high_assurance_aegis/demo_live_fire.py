@@ -144,7 +144,7 @@ def scenario_2_honeypot_attack():
         simulate_delay()
         
         print_step(3, "Immediate ban enforcement")
-        banned_ips.add(attacker_ip)
+        honeypot.ban_ip(attacker_ip)
         print_alert(f"IP {attacker_ip} PERMANENTLY BANNED", "ALERT")
         print_result("Total Banned", len(banned_ips), Colors.FAIL)
         
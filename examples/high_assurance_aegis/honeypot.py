@@ -8,23 +8,20 @@ banned as they are probing the system.
 Security Control: NIST SI-4 (Information System Monitoring)
 """
 
-from typing import Set
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+import asyncio
+import json
+import logging
+import re
+import socket
 import time
 
 try:
-    from fastapi import Request, Response
-    from starlette.middleware.base import BaseHTTPMiddleware
+    from fastapi import Response
     FASTAPI_AVAILABLE = True
 except ImportError:
     FASTAPI_AVAILABLE = False
-    # Dummy classes for when FastAPI is not installed
-    class BaseHTTPMiddleware:
-        def __init__(self, app):
-            self.app = app
-    class Request:
-        """Minimal stub Request type used when FastAPI is unavailable."""
-        pass
-
+    # Dummy class for when FastAPI is not installed
     class Response:
         """
         Minimal stub Response type used when FastAPI is unavailable.
@@ -40,8 +37,43 @@ except ImportError:
             self.status_code = kwargs.get("status_code", 200)
             self.headers = kwargs.get("headers", {})
 
+# Module logger for background audit-writer failures
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+# Ban-set key: the address as an int, or the raw string if it isn't one
+IPKey = Union[int, str]
+
+# IPv6 keys are offset past the IPv4 range so ::1 can't collide with 0.0.0.1
+_IPV6_OFFSET = 1 << 128
+
+
+def _ip_key(ip: str) -> IPKey:
+    """Pack an IP address into an int key (hashes as one machine word)."""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except OSError:
+        pass
+    try:
+        return _IPV6_OFFSET + int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except OSError:
+        return ip  # e.g. "unknown" or a unix socket path
+
+
+def _ip_str(key: IPKey) -> str:
+    """Inverse of _ip_key."""
+    if isinstance(key, str):
+        return key
+    if key < _IPV6_OFFSET:
+        return socket.inet_ntop(socket.AF_INET, key.to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, (key - _IPV6_OFFSET).to_bytes(16, 'big'))
 
-class CanaryHoneypotMiddleware(BaseHTTPMiddleware):
+
+class CanaryHoneypotMiddleware:
     """
     Active defense middleware using canary task codes.
     
@@ -55,140 +87,302 @@ class CanaryHoneypotMiddleware(BaseHTTPMiddleware):
     3. Returned a 403 Forbidden
     
     This detects automated probing attempts.
+    
+    Implemented as plain ASGI middleware rather than BaseHTTPMiddleware,
+    which wraps every request in a task group and a memory stream.
     """
     
     # Trap codes - Valid primes but NOT in TASKS mapping
-    TRAP_CODES = {43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97}
+    TRAP_CODES = frozenset({43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97})
     
     # Parameter honeypots - Valid Fibonacci but unusual combinations
     # These are paired with trap codes to detect sophisticated probes
-    CANARY_PARAMS = {34, 55}  # Higher Fibonacci numbers rarely used
+    CANARY_PARAMS = frozenset({34, 55})  # Higher Fibonacci numbers rarely used
+    
+    # Banned-client 403, encoded once; each request still gets its own
+    # message dicts and header list, which outer middleware may mutate
+    _BANNED_BODY = b"Access Denied - IP Banned"
+    _BANNED_HEADERS = (
+        (b"x-honeypot-triggered", b"true"),
+        (b"content-length", str(len(_BANNED_BODY)).encode()),
+    )
     
-    def __init__(self, app, banned_ips: Set[str] = None, audit_logger=None):
+    # TASK-PARAM prefix of "TASK-PARAM | CONTEXT": both codes in one scan,
+    # accepting exactly what int() accepts for each dash-separated part
+    _CODES_PATTERN = re.compile(r"\s*(\+?\d+(?:_\d+)*)\s*-\s*(\+?\d+(?:_\d+)*)\s*(?:[-|]|\Z)")
+    
+    def __init__(self, app, banned_ips: Set[IPKey] = None, audit_logger=None):
         """
         Initialize honeypot middleware.
         
         Args:
             app: FastAPI application
-            banned_ips: Set of banned IP addresses (shared reference)
+            banned_ips: Set of banned IP keys from _ip_key (shared reference)
             audit_logger: Audit logging instance
         """
-        super().__init__(app)
+        self.app = app
         self.banned_ips = banned_ips if banned_ips is not None else set()
         self.audit_logger = audit_logger
-        self.trap_triggers = {}  # IP -> List of trigger times
+        
+        # Audit events are queued and written off the request path by a
+        # background task (started on first use in the serving loop)
+        self._audit_queue: Optional[asyncio.Queue] = None
+        self._audit_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._audit_task: Optional[asyncio.Task] = None
+        
+        # IP -> (first trigger time, last trigger time, trigger count);
+        # constant size per IP however often it probes
+        self.trap_triggers: Dict[str, Tuple[float, float, int]] = {}
+        
+        # Bit c set <=> code c is a trap; parsed codes are never negative,
+        # so the hot path is a shift and an and with no hashing
+        self._trap_mask = sum(1 << code for code in self.TRAP_CODES)
+        self._canary_mask = sum(1 << code for code in self.CANARY_PARAMS)
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Process request through honeypot detection.
         
         Args:
-            request: Incoming HTTP request
-            call_next: Next middleware/handler
-            
-        Returns:
-            Response object
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        ip_key = _ip_key(client_ip)
+        # Shared with downstream handlers (request.state) so they don't
+        # derive the address again
+        state = scope.setdefault("state", {})
+        state["client_ip"] = client_ip
+        state["client_ip_key"] = ip_key
         
         # Check if IP is already banned
-        if client_ip in self.banned_ips:
-            if self.audit_logger:
-                self.audit_logger.log_event("BANNED_ACCESS_ATTEMPT", {
-                    'ip': client_ip,
-                    'path': request.url.path
-                })
+        if ip_key in self.banned_ips:
+            self._audit("BANNED_ACCESS_ATTEMPT", {
+                'ip': client_ip,
+                'path': scope["path"]
+            })
             
-            return Response(
-                content="Access Denied - IP Banned",
-                status_code=403,
-                headers={"X-Honeypot-Triggered": "true"}
-            )
+            await send({
+                "type": "http.response.start",
+                "status": 403,
+                "headers": list(self._BANNED_HEADERS)
+            })
+            await send({"type": "http.response.body", "body": self._BANNED_BODY})
+            return
         
         # For POST requests to /process, check for trap codes
-        if request.method == "POST" and request.url.path == "/process":
-            try:
-                body = await request.body()
-                
+        if scope["method"] == "POST" and scope["path"] == "/process":
+            # Read only as much of the body as the trap decision needs, then
+            # replay those messages downstream ahead of the rest
+            messages: List[Message] = []
+            body = bytearray()
+            complete = False
+            while True:
+                message = await receive()
+                messages.append(message)
+                if message["type"] != "http.request":
+                    complete = True
+                    break
+                body += message.get("body", b"")
+                if not message.get("more_body", False):
+                    complete = True
+                    break
+                # Also hold on to enough of the body for the audit record
+                if len(body) >= self._AUDIT_PREFIX_BYTES and self._codes_decided(body):
+                    break
+            
+            async def replay(receive: Receive = receive) -> Message:
+                if messages:
+                    return messages.pop(0)
+                return await receive()
+            
+            response = self._check_traps(client_ip, bytes(body), complete, ip_key)
+            if response is not None:
+                await response(scope, replay, send)
+                return
+            receive = replay
+        
+        # Request is clean, proceed
+        await self.app(scope, receive, send)
+    
+    # Body prefixes that more bytes could still turn into a different
+    # TASK-PARAM match; anything else already fixes the outcome
+    _UNDECIDED_PREFIX = re.compile(rb"[\s\d+_-]*")
+    
+    # Characters of input kept in a HONEYPOT_TRIGGERED record, and the body
+    # bytes (4 per UTF-8 character at most) that always contain them
+    _AUDIT_INPUT_CHARS = 100
+    _AUDIT_PREFIX_BYTES = 4 * _AUDIT_INPUT_CHARS
+    
+    def _codes_decided(self, body: bytearray) -> bool:
+        """
+        Whether a partial /process body already determines the trap check.
+        
+        JSON bodies need the whole document. A raw "TASK-PARAM | CONTEXT"
+        body is decided as soon as it holds any byte the codes can't contain.
+        """
+        stripped = body.lstrip()
+        if not stripped or stripped[:1] == b"{":
+            return False
+        return self._UNDECIDED_PREFIX.fullmatch(body) is None
+    
+    def _check_traps(self, client_ip: str, body: bytes, complete: bool = True,
+                     ip_key: Optional[IPKey] = None) -> Optional[Response]:
+        """
+        Inspect a /process body for trap codes, banning the client on a hit.
+        
+        Args:
+            client_ip: Client address
+            body: Raw request body, or a decided raw-input prefix of it
+            complete: False when body is only such a prefix
+            ip_key: _ip_key(client_ip), if the caller already has it
+            
+        Returns:
+            403 Response if a trap was triggered, None if the request is clean
+        """
+        try:
+            if not complete:
+                # Raw input prefix; it may end inside a multi-byte character
+                input_str = body.decode('utf-8', 'replace')
+            else:
                 # Decode with error handling
                 try:
                     body_str = body.decode('utf-8')
                 except UnicodeDecodeError:
                     # Invalid encoding - let it through to be caught by protocol validation
-                    pass
-                else:
-                    # Parse JSON body to extract input field
-                    import json
-                    try:
-                        body_json = json.loads(body_str)
-                        input_str = body_json.get('input', body_str)
-                    except (json.JSONDecodeError, AttributeError):
-                        # Not JSON, treat as raw input
-                        input_str = body_str
-                    
-                    # Parse input format: TASK-PARAM | CONTEXT
-                    if '-' in input_str:
-                        codes_part = input_str.split('|')[0].strip()
-                        if '-' in codes_part:
-                            parts = codes_part.split('-')
-                            
-                            # Parse with error handling
-                            try:
-                                task_code = int(parts[0])
-                                param_code = int(parts[1]) if len(parts) > 1 else 0
-                            except (ValueError, IndexError):
-                                # Invalid format - let it through to protocol validation
-                                pass
-                            else:
-                                # Check for trap codes
-                                is_trap = False
-                                trap_reason = None
-                                
-                                if task_code in self.TRAP_CODES:
-                                    is_trap = True
-                                    trap_reason = f"Trap Task Code {task_code}"
-                                
-                                # Sophisticated probe detection: Valid task + Canary param
-                                if param_code in self.CANARY_PARAMS:
-                                    is_trap = True
-                                    trap_reason = f"Canary Parameter {param_code}"
-                                
-                                if is_trap:
-                                    # Log the intrusion attempt
-                                    if self.audit_logger:
-                                        self.audit_logger.log_event("HONEYPOT_TRIGGERED", {
-                                            'ip': client_ip,
-                                            'task_code': task_code,
-                                            'param_code': param_code,
-                                            'reason': trap_reason,
-                                            'input': input_str[:100]  # First 100 chars
-                                        })
-                                    
-                                    # Track trigger times for rate analysis
-                                    if client_ip not in self.trap_triggers:
-                                        self.trap_triggers[client_ip] = []
-                                    self.trap_triggers[client_ip].append(time.time())
-                                    
-                                    # Ban the IP permanently
-                                    self.banned_ips.add(client_ip)
-                                    
-                                    return Response(
-                                        content=f"Access Denied - Security Violation Detected",
-                                        status_code=403,
-                                        headers={
-                                            "X-Honeypot-Triggered": "true",
-                                            "X-Ban-Reason": trap_reason
-                                        }
-                                    )
+                    return None
                 
-            except Exception as e:
-                # If parsing fails, let it through (will be caught by protocol validation)
-                pass
+                # Parse JSON body to extract input field
+                try:
+                    body_json = json.loads(body_str)
+                    input_str = body_json.get('input', body_str)
+                except (json.JSONDecodeError, AttributeError):
+                    # Not JSON, treat as raw input
+                    input_str = body_str
+            
+            # Parse input format: TASK-PARAM | CONTEXT
+            match = self._CODES_PATTERN.match(input_str)
+            if match is None:
+                # Invalid format - let it through to protocol validation
+                return None
+            task_code = int(match.group(1))
+            param_code = int(match.group(2))
+            
+            # Check for trap codes
+            is_trap = False
+            trap_reason = None
+            
+            if (self._trap_mask >> task_code) & 1:
+                is_trap = True
+                trap_reason = f"Trap Task Code {task_code}"
+            
+            # Sophisticated probe detection: Valid task + Canary param
+            if (self._canary_mask >> param_code) & 1:
+                is_trap = True
+                trap_reason = f"Canary Parameter {param_code}"
+            
+            if not is_trap:
+                return None
+            
+            # Log the intrusion attempt
+            self._audit("HONEYPOT_TRIGGERED", {
+                'ip': client_ip,
+                'task_code': task_code,
+                'param_code': param_code,
+                'reason': trap_reason,
+                'input': input_str[:self._AUDIT_INPUT_CHARS]
+            })
+            
+            # Track trigger times for rate analysis
+            now = time.time()
+            first, _, count = self.trap_triggers.get(client_ip, (now, now, 0))
+            self.trap_triggers[client_ip] = (first, now, count + 1)
+            
+            # Ban the IP permanently
+            self.banned_ips.add(_ip_key(client_ip) if ip_key is None else ip_key)
+            
+            return Response(
+                content=f"Access Denied - Security Violation Detected",
+                status_code=403,
+                headers={
+                    "X-Honeypot-Triggered": "true",
+                    "X-Ban-Reason": trap_reason
+                }
+            )
         
-        # Request is clean, proceed
-        response = await call_next(request)
-        return response
+        except Exception:
+            # If parsing fails, let it through (will be caught by protocol validation)
+            return None
+    
+    # Most queued audit events handed to the logger in one executor call
+    AUDIT_BATCH_SIZE = 64
+    
+    def _audit(self, event_type: str, data: Dict[str, Any]):
+        """
+        Record an audit event without blocking the request on log I/O.
+        
+        Inside an event loop the event is queued for the background
+        writer; outside one (e.g. direct calls in tests) it is logged
+        synchronously.
+        """
+        if not self.audit_logger:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.audit_logger.log_event(event_type, data)
+            return
+        
+        if self._audit_loop is not loop:
+            self._audit_queue = asyncio.Queue()
+            self._audit_loop = loop
+            self._audit_task = loop.create_task(self._audit_writer(self._audit_queue))
+        self._audit_queue.put_nowait((event_type, data))
+    
+    async def _audit_writer(self, audit_queue: asyncio.Queue):
+        """Drain queued audit events in batches on the default executor."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await audit_queue.get()]
+            while len(batch) < self.AUDIT_BATCH_SIZE and not audit_queue.empty():
+                batch.append(audit_queue.get_nowait())
+            try:
+                await loop.run_in_executor(None, self._write_audit_batch, batch)
+            except Exception:
+                # Keep draining: a dead writer would hang every flush_audit()
+                logger.exception("Audit batch of %d events failed", len(batch))
+            finally:
+                for _ in batch:
+                    audit_queue.task_done()
+    
+    def _write_audit_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Hand a batch of queued events to the audit logger, in order."""
+        for event_type, data in batch:
+            self.audit_logger.log_event(event_type, data)
+    
+    async def flush_audit(self):
+        """Wait until every queued audit event has reached the audit logger."""
+        if self._audit_queue is not None and self._audit_loop is asyncio.get_running_loop():
+            await self._audit_queue.join()
+    
+    async def close_audit(self):
+        """Write every queued audit event, then stop the background writer."""
+        await self.flush_audit()
+        task = self._audit_task
+        if task is not None and self._audit_loop is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._audit_queue = self._audit_loop = self._audit_task = None
     
     def get_banned_count(self) -> int:
         """Get count of banned IPs."""
@@ -204,19 +398,28 @@ class CanaryHoneypotMiddleware(BaseHTTPMiddleware):
         stats = {
             'total_banned': len(self.banned_ips),
             'trap_triggers': len(self.trap_triggers),
-            'banned_ips': list(self.banned_ips),
+            'banned_ips': [_ip_str(key) for key in self.banned_ips],
             'trigger_details': {}
         }
         
-        for ip, times in self.trap_triggers.items():
+        for ip, (first, last, count) in self.trap_triggers.items():
             stats['trigger_details'][ip] = {
-                'trigger_count': len(times),
-                'first_trigger': times[0] if times else None,
-                'last_trigger': times[-1] if times else None
+                'trigger_count': count,
+                'first_trigger': first,
+                'last_trigger': last
             }
         
         return stats
     
+    def ban_ip(self, ip: str):
+        """
+        Manually ban an IP.
+        
+        Args:
+            ip: IP address to ban
+        """
+        self.banned_ips.add(_ip_key(ip))
+    
     def unban_ip(self, ip: str) -> bool:
         """
         Manually unban an IP (for testing or false positive correction).
@@ -227,8 +430,9 @@ class CanaryHoneypotMiddleware(BaseHTTPMiddleware):
         Returns:
             True if IP was banned and is now unbanned
         """
-        if ip in self.banned_ips:
-            self.banned_ips.remove(ip)
+        key = _ip_key(ip)
+        if key in self.banned_ips:
+            self.banned_ips.remove(key)
             if ip in self.trap_triggers:
                 del self.trap_triggers[ip]
             return True
@@ -13,12 +13,48 @@ import os
 import json
 from typing import Any, Dict
 
+# Optional C JSON codec for the JSON-RPC loop (falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from mathprotocol import MathProtocol, MockLLM
 
 
+def _loads(data: bytes) -> Any:
+    """Decode one JSON-RPC message."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Encode one JSON-RPC message as UTF-8 bytes."""
+    if ORJSON_AVAILABLE:
+        # Task and parameter tables are keyed by int codes
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+
+# JSON-RPC result envelope for splicing in an already-encoded result,
+# in the same layout _dumps produces
+_RESULT_ENVELOPE = (
+    b'{"jsonrpc":"2.0","id":%b,"result":%b}' if ORJSON_AVAILABLE
+    else b'{"jsonrpc": "2.0", "id": %b, "result": %b}'
+)
+
+
+def _write_message(obj: Any):
+    """Write one JSON-RPC message line to stdout and flush it."""
+    sys.stdout.buffer.write(_dumps(obj) + b"\n")
+    sys.stdout.buffer.flush()
+
+
 class MCPServer:
     """
     MCP Server for MathProtocol.
@@ -82,6 +118,38 @@ class MCPServer:
                 }
             }
         }
+        
+        # Tool definitions never change after startup: build the
+        # tools/list result, and its encoded form, once
+        self._tools_list = {"tools": [
+            {"name": name, **definition}
+            for name, definition in self.tools.items()
+        ]}
+        self._tools_list_json = _dumps(self._tools_list)
+        
+        # Tool name -> (handler, whether it takes the string "input" argument)
+        self._dispatch = {
+            "validate_mathprotocol_input": (self._validate_input, True),
+            "parse_mathprotocol_input": (self._parse_input, True),
+            "process_mathprotocol_request": (self._process_request, True),
+            "get_mathprotocol_tasks": (self._get_tasks, False),
+        }
+        
+        # Likewise the task/parameter tables behind get_mathprotocol_tasks
+        self._tasks = {
+            "tasks": {
+                code: {
+                    "name": name,
+                    "code": code,
+                    "type": "classification" if code in self.protocol.CLASSIFICATION_TASKS else "generative"
+                }
+                for code, name in self.protocol.TASKS.items()
+            },
+            "parameters": {
+                code: name
+                for code, name in self.protocol.PARAMS.items()
+            }
+        }
     
     def list_tools(self) -> Dict[str, Any]:
         """
@@ -90,10 +158,7 @@ class MCPServer:
         Returns:
             Dictionary of tool definitions
         """
-        return {"tools": [
-            {"name": name, **definition}
-            for name, definition in self.tools.items()
-        ]}
+        return self._tools_list
     
     def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -110,39 +175,24 @@ class MCPServer:
         if not isinstance(arguments, dict):
             return {"error": "Invalid arguments: expected object"}
 
-        if name == "validate_mathprotocol_input":
-            if "input" not in arguments:
-                return {"error": "Missing required field: input"}
-            if not isinstance(arguments["input"], str):
-                return {"error": "Invalid type for field 'input': expected string"}
-            return self._validate_input(arguments["input"])
-        
-        elif name == "parse_mathprotocol_input":
-            if "input" not in arguments:
-                return {"error": "Missing required field: input"}
-            if not isinstance(arguments["input"], str):
-                return {"error": "Invalid type for field 'input': expected string"}
-            return self._parse_input(arguments["input"])
-        
-        elif name == "process_mathprotocol_request":
-            if "input" not in arguments:
-                return {"error": "Missing required field: input"}
-            if not isinstance(arguments["input"], str):
-                return {"error": "Invalid type for field 'input': expected string"}
-            return self._process_request(arguments["input"])
-        
-        elif name == "get_mathprotocol_tasks":
-            return self._get_tasks()
-        
-        else:
+        entry = self._dispatch.get(name) if isinstance(name, str) else None
+        if entry is None:
             return {"error": f"Unknown tool: {name}"}
+        
+        handler, takes_input = entry
+        if not takes_input:
+            return handler()
+        if "input" not in arguments:
+            return {"error": "Missing required field: input"}
+        if not isinstance(arguments["input"], str):
+            return {"error": "Invalid type for field 'input': expected string"}
+        return handler(arguments["input"])
     
     def _validate_input(self, input_str: str) -> Dict[str, Any]:
         """Validate input format."""
-        is_valid = self.protocol.validate_input(input_str)
+        parsed = self.protocol.parse_input(input_str)
         
-        if is_valid:
-            parsed = self.protocol.parse_input(input_str)
+        if parsed is not None:
             return {
                 "valid": True,
                 "task": parsed['task'],
@@ -173,8 +223,9 @@ class MCPServer:
     
     def _process_request(self, input_str: str) -> Dict[str, Any]:
         """Process complete request."""
-        # Validate
-        if not self.protocol.validate_input(input_str):
+        # Validate and parse in one step
+        parsed_input = self.protocol.parse_input(input_str)
+        if parsed_input is None:
             return {"error": "Invalid input format"}
         
         # Process
@@ -182,8 +233,6 @@ class MCPServer:
             response = self.llm.process(input_str)
             parsed_response = self.protocol.parse_response(response)
             
-            # Parse input for validation
-            parsed_input = self.protocol.parse_input(input_str)
             is_valid_response = self.protocol.validate_response(
                 response, 
                 parsed_input['task']
@@ -202,20 +251,7 @@ class MCPServer:
     
     def _get_tasks(self) -> Dict[str, Any]:
         """Get list of available tasks."""
-        return {
-            "tasks": {
-                code: {
-                    "name": name,
-                    "code": code,
-                    "type": "classification" if code in self.protocol.CLASSIFICATION_TASKS else "generative"
-                }
-                for code, name in self.protocol.TASKS.items()
-            },
-            "parameters": {
-                code: name
-                for code, name in self.protocol.PARAMS.items()
-            }
-        }
+        return self._tasks
 
 
 def start_stdio_server():
@@ -233,18 +269,23 @@ def start_stdio_server():
     while True:
         try:
             # Read JSON-RPC request from stdin
-            line = sys.stdin.readline()
+            line = sys.stdin.buffer.readline()
             if not line:
                 break
             
-            request = json.loads(line)
+            request = _loads(line)
             method = request.get("method")
             params = request.get("params", {})
             request_id = request.get("id")
             
             # Handle request
             if method == "tools/list":
-                result = server.list_tools()
+                # Splice the pre-encoded tool list into the envelope
+                sys.stdout.buffer.write(
+                    _RESULT_ENVELOPE % (_dumps(request_id), server._tools_list_json) + b"\n"
+                )
+                sys.stdout.buffer.flush()
+                continue
             
             elif method == "tools/call":
                 tool_name = params.get("name")
@@ -261,7 +302,7 @@ def start_stdio_server():
                 "result": result
             }
             
-            print(json.dumps(response), flush=True)
+            _write_message(response)
             
         except Exception as e:
             error_response = {
@@ -272,7 +313,7 @@ def start_stdio_server():
                     "message": str(e)
                 }
             }
-            print(json.dumps(error_response), flush=True)
+            _write_message(error_response)
 
 
 def test_mcp_server():
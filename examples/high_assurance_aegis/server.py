@@ -20,9 +20,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 import uvicorn
 import os
+import asyncio
+import hashlib
+import hmac
+import uuid
 
 from mathprotocol import MathProtocol, MockLLM
 from aegis_core import DataAirlock, MerkleAuditChain, CircuitBreaker, DeadLetterVault
@@ -30,6 +34,21 @@ from honeypot import CanaryHoneypotMiddleware
 
 # Security: Admin API key from environment variable
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "dev-admin-key-change-in-production")
+# Digest compared per request, so both sides are fixed-size 32-byte values
+_ADMIN_KEY_DIGEST = hashlib.sha256(ADMIN_API_KEY.encode()).digest()
+
+
+def _is_admin(api_key: Optional[str]) -> bool:
+    """Constant-time check of an API key against the admin key digest."""
+    provided = hashlib.sha256((api_key or "").encode()).digest()
+    return bool(api_key) and hmac.compare_digest(provided, _ADMIN_KEY_DIGEST)
+
+
+try:
+    from pydantic import ConfigDict  # Pydantic v2: validation runs in pydantic-core
+    PYDANTIC_V2 = True
+except ImportError:
+    PYDANTIC_V2 = False
 
 
 # Request/Response Models
@@ -37,6 +56,13 @@ class ProcessRequest(BaseModel):
     """Request model for /process endpoint."""
     input: str
     redact_phi: bool = True
+    
+    # Unknown fields are rejected rather than validated and dropped
+    if PYDANTIC_V2:
+        model_config = ConfigDict(extra='forbid')
+    else:
+        class Config:
+            extra = 'forbid'
 
 
 class ProcessResponse(BaseModel):
@@ -48,10 +74,20 @@ class ProcessResponse(BaseModel):
 
 # Initialize Security Components
 airlock = DataAirlock()
-audit_chain = MerkleAuditChain(log_dir="./aegis_audit_logs", batch_size=10)
+# Every audit event reaches disk within AUDIT_MAX_LATENCY, full batch or not
+AUDIT_MAX_LATENCY = 0.1
+audit_chain = MerkleAuditChain(log_dir="./aegis_audit_logs", batch_size=10,
+                               max_latency=AUDIT_MAX_LATENCY)
 circuit_breaker = CircuitBreaker(failure_threshold=5, timeout=60)
 dead_letter_vault = DeadLetterVault(vault_dir="./aegis_dead_letters")
 banned_ips = set()  # Shared across honeypot middleware
+# Monitoring endpoints reuse a chain verification this many seconds old
+VERIFY_MAX_AGE = 5.0
+# Failure records being persisted at once; a failure storm queues behind this
+FORENSIC_MAX_PENDING = 64
+_forensic_slots: Optional[asyncio.Semaphore] = None
+_forensic_tasks: Set[asyncio.Task] = set()
+_audit_flusher: Optional[asyncio.Task] = None
 
 # Initialize Protocol and LLM
 protocol = MathProtocol()
@@ -94,7 +130,10 @@ async def process_request(request: ProcessRequest, http_request: Request):
     Returns:
         ProcessResponse with output and metadata
     """
-    client_ip = http_request.client.host if http_request.client else "unknown"
+    # Set by the honeypot middleware; derived here only if it didn't run
+    client_ip = http_request.scope.get("state", {}).get("client_ip")
+    if client_ip is None:
+        client_ip = http_request.client.host if http_request.client else "unknown"
     
     # Log request metadata only (no raw input to avoid PHI/PII leakage)
     audit_chain.log_event("REQUEST", {
@@ -103,8 +142,9 @@ async def process_request(request: ProcessRequest, http_request: Request):
     })
     
     try:
-        # Step 1: Validate Protocol Input
-        if not protocol.validate_input(request.input):
+        # Step 1: Validate and parse Protocol Input (None if invalid)
+        parsed_input = protocol.parse_input(request.input)
+        if parsed_input is None:
             audit_chain.log_event("VALIDATION_FAILED", {
                 'ip': client_ip
             })
@@ -117,8 +157,8 @@ async def process_request(request: ProcessRequest, http_request: Request):
         if request.redact_phi:
             # Extract context from input
             if '|' in request.input:
-                codes, context = request.input.split('|', 1)
-                redacted_context, token_map = airlock.redact(context.strip())
+                codes = request.input.split('|', 1)[0]
+                redacted_context, token_map = airlock.redact(parsed_input['context'])
                 redacted_input = f"{codes.strip()} | {redacted_context}"
             else:
                 redacted_input = request.input
@@ -131,10 +171,7 @@ async def process_request(request: ProcessRequest, http_request: Request):
         raw_output = circuit_breaker.call(process_with_llm)
         
         # Step 4: Validate Response
-        parsed_input = protocol.parse_input(request.input)
-        task_code = parsed_input['task'] if parsed_input else 0
-        
-        if not protocol.validate_response(raw_output, task_code):
+        if not protocol.validate_response(raw_output, parsed_input['task']):
             raise ValueError("LLM violated protocol")
         
         # Step 5: Rehydrate Response (restore PHI if it was redacted)
@@ -169,24 +206,22 @@ async def process_request(request: ProcessRequest, http_request: Request):
         
     except Exception as e:
         # Generate correlation ID for tracking
-        import uuid
-        correlation_id = str(uuid.uuid4())
+        correlation_id = uuid.uuid4().hex
         
-        # Log failure with full details
-        audit_chain.log_event("ERROR", {
+        # Log failure and store in Dead Letter Vault in the background, so
+        # the error response doesn't wait on traceback formatting or disk
+        audit_data = {
             'ip': client_ip,
             'correlation_id': correlation_id,
             'error_type': type(e).__name__,
             'circuit_state': circuit_breaker.get_state()
-        })
-        
-        # Store in Dead Letter Vault
+        }
         request_data = {
             'ip': client_ip,
             'redact_phi': request.redact_phi,
             'correlation_id': correlation_id
         }
-        dead_letter_vault.store(request_data, e)
+        _spawn_failure_record(audit_data, request_data, e)
         
         # Return generic error response (don't leak exception details)
         raise HTTPException(
@@ -195,6 +230,29 @@ async def process_request(request: ProcessRequest, http_request: Request):
         )
 
 
+def _record_failure(audit_data: Dict[str, Any], request_data: Dict[str, Any], error: Exception):
+    """Write the ERROR audit event and the dead letter (runs in a worker thread)."""
+    audit_chain.log_event("ERROR", audit_data)
+    dead_letter_vault.store(request_data, error)
+
+
+def _spawn_failure_record(audit_data: Dict[str, Any], request_data: Dict[str, Any], error: Exception):
+    """Persist a failure record off the request path, at most FORENSIC_MAX_PENDING at once."""
+    global _forensic_slots
+    if _forensic_slots is None:
+        _forensic_slots = asyncio.Semaphore(FORENSIC_MAX_PENDING)
+    
+    async def persist():
+        async with _forensic_slots:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _record_failure, audit_data, request_data, error)
+    
+    # Keep a reference until done; the loop only holds tasks weakly
+    task = asyncio.ensure_future(persist())
+    _forensic_tasks.add(task)
+    task.add_done_callback(_forensic_tasks.discard)
+
+
 @app.get("/health")
 async def health_check():
     """
@@ -204,13 +262,17 @@ async def health_check():
         System health and security metrics
     """
     circuit_state = circuit_breaker.get_state()
+    # list_failed() waits for queued dead letters to reach disk; keep that
+    # off the event loop
+    loop = asyncio.get_running_loop()
+    dead_letters = await loop.run_in_executor(None, dead_letter_vault.list_failed)
     
     health = {
         'status': 'healthy' if circuit_state['state'] == 'CLOSED' else 'degraded',
         'circuit_breaker': circuit_state,
         'banned_ips': len(banned_ips),
-        'dead_letters': len(dead_letter_vault.list_failed()),
-        'audit_chain_valid': audit_chain.verify_chain()
+        'dead_letters': len(dead_letters),
+        'audit_chain_valid': audit_chain.verify_chain(max_age=VERIFY_MAX_AGE)
     }
     
     return JSONResponse(content=health)
@@ -228,9 +290,10 @@ async def security_status(http_request: Request, api_key: Optional[str] = None):
         Comprehensive security metrics
     """
     # Verify API key using constant-time comparison
-    import hmac
-    if not api_key or not hmac.compare_digest(api_key, ADMIN_API_KEY):
+    if not _is_admin(api_key):
         raise HTTPException(status_code=403, detail="Unauthorized: Invalid API key")
+    loop = asyncio.get_running_loop()
+    dead_letters = await loop.run_in_executor(None, dead_letter_vault.list_failed)
     
     return {
         'circuit_breaker': circuit_breaker.get_state(),
@@ -238,10 +301,10 @@ async def security_status(http_request: Request, api_key: Optional[str] = None):
             'count': len(banned_ips)
         },
         'dead_letters': {
-            'count': len(dead_letter_vault.list_failed())
+            'count': len(dead_letters)
         },
         'audit_chain': {
-            'valid': audit_chain.verify_chain(),
+            'valid': audit_chain.verify_chain(max_age=VERIFY_MAX_AGE),
             'buffer_size': len(audit_chain.buffer)
         }
     }
@@ -260,8 +323,7 @@ async def reset_security(http_request: Request, api_key: Optional[str] = None, c
         Reset status
     """
     # Verify API key using constant-time comparison
-    import hmac
-    if not api_key or not hmac.compare_digest(api_key, ADMIN_API_KEY):
+    if not _is_admin(api_key):
         raise HTTPException(status_code=403, detail="Unauthorized: Invalid API key")
     reset_actions = []
     
@@ -274,7 +336,7 @@ async def reset_security(http_request: Request, api_key: Optional[str] = None, c
         reset_actions.append("banned_ips")
     
     if component in ["vault", "all"]:
-        dead_letter_vault.clear_vault()
+        await asyncio.get_running_loop().run_in_executor(None, dead_letter_vault.clear_vault)
         reset_actions.append("dead_letter_vault")
     
     if component in ["airlock", "all"]:
@@ -287,10 +349,49 @@ async def reset_security(http_request: Request, api_key: Optional[str] = None, c
     }
 
 
+async def _flush_audit_deadlines():
+    """Write partial audit batches once they reach AUDIT_MAX_LATENCY."""
+    loop = asyncio.get_running_loop()
+    while True:
+        remaining = audit_chain.due_in()
+        if remaining is None:
+            await asyncio.sleep(AUDIT_MAX_LATENCY)
+        elif remaining > 0:
+            await asyncio.sleep(remaining)
+        else:
+            await loop.run_in_executor(None, audit_chain.flush_due)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the audit deadline flusher."""
+    global _audit_flusher
+    _audit_flusher = asyncio.ensure_future(_flush_audit_deadlines())
+
+
+def _honeypot_middleware() -> Optional[CanaryHoneypotMiddleware]:
+    """Find the honeypot instance in the built middleware stack."""
+    layer = app.middleware_stack
+    while layer is not None:
+        if isinstance(layer, CanaryHoneypotMiddleware):
+            return layer
+        layer = getattr(layer, "app", None)
+    return None
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Flush audit logs on shutdown."""
-    audit_chain.force_flush()
+    if _audit_flusher is not None:
+        _audit_flusher.cancel()
+    if _forensic_tasks:
+        await asyncio.gather(*_forensic_tasks, return_exceptions=True)
+    # Queued HONEYPOT/BANNED events must reach the chain before it closes
+    honeypot = _honeypot_middleware()
+    if honeypot is not None:
+        await honeypot.close_audit()
+    audit_chain.close()
+    dead_letter_vault.close()
     print("AEGIS Server shutdown - Audit logs flushed")
 
 
@@ -312,4 +413,9 @@ if __name__ == "__main__":
     print("  POST /security/reset - Reset security components")
     print("=" * 60)
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker: the ban set, audit chain and circuit breaker are
+    # in-process state, and two writers would fork the Merkle chain.
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard]);
+    # the audit chain already records every request, so the access log is off.
+    uvicorn.run(app, host="0.0.0.0", port=8000, workers=1,
+                loop="auto", http="auto", access_log=False)
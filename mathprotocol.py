@@ -10,7 +10,72 @@ Version 2.1 also adds ProtocolRegistry for dynamic task/parameter registration.
 """
 
 import re
-from typing import Dict, List, Optional, Union, Any
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple, Union, Any
+
+
+# Task primes accepted by the protocol (MathProtocol.PRIMES). Defined ahead
+# of ProtocolRegistry so task registration can check membership directly.
+_PROTOCOL_PRIMES = frozenset({
+    2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97
+})
+
+# Protocol patterns, compiled once at import.
+# Full input: TASK-PARAM with optional | CONTEXT. Explicit whitespace limits
+# around the pipe prevent catastrophic backtracking (ReDoS).
+_INPUT_RE = re.compile(r'^(\d+)-(\d+)(?:\s{0,10}\|\s{0,10}(.+))?$')
+# Leading TASK-PARAM codes only, for diagnosing rejected input
+_INPUT_CODES_RE = re.compile(r'^(\d+)-(\d+)')
+# Integer codes in a response
+_DIGITS_RE = re.compile(r'\d+')
+
+
+# Default registry contents, copied into ProtocolRegistry by reset()
+# Default primes (tasks) to match MathProtocol.TASKS
+_DEFAULT_TASKS = {
+    2: "Sentiment",
+    3: "Summarization",
+    5: "LangDetect",
+    7: "EntityExtract",
+    11: "Q&A",
+    13: "Classify",
+    17: "Translate",
+    19: "Moderate",
+    23: "Keywords",
+    29: "Readability",
+}
+
+# Default fibonacci (parameters) to match MathProtocol.PARAMS
+_DEFAULT_PARAMETERS = {
+    1: "Brief",
+    2: "Medium",
+    3: "Detailed",
+    5: "JSON",
+    8: "List",
+    13: "Confidence",
+    21: "Explain",
+    # Extended parameters not in original PARAMS
+    34: "INCLUDE_CITATIONS",
+    55: "REDACT_PII",
+    89: "MAX_PRECISION",
+}
+
+# Default powers of 2 (responses) to match MathProtocol.RESPONSES
+_DEFAULT_RESPONSES = {
+    # Success Bit (mandatory in v2.1, treated separately from semantic flags)
+    1: "SUCCESS_BIT",
+    # Semantic response flags (must align with MathProtocol.RESPONSES)
+    2: "Positive",
+    4: "Negative",
+    8: "Neutral",
+    16: "English",
+    32: "Spanish",
+    64: "French",
+    128: "HighConf",
+    256: "MedConf",
+    512: "LowConf",
+}
 
 
 class ProtocolRegistry:
@@ -25,62 +90,51 @@ class ProtocolRegistry:
     _instance = None
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ProtocolRegistry, cls).__new__(cls)
-            cls._instance.tasks = {}
-            cls._instance.parameters = {}
-            cls._instance.responses = {}
-            cls._instance._initialize_defaults()
-        return cls._instance
+        # Repeat constructions are one attribute read; library code uses
+        # the module-level `registry` and never calls this after import
+        instance = cls._instance
+        if instance is None:
+            instance = cls._instance = super(ProtocolRegistry, cls).__new__(cls)
+            instance.reset()
+        return instance
 
     def _initialize_defaults(self):
-        """Initialize default protocol mappings."""
-        # Register default primes (tasks) to match MathProtocol.TASKS
-        self.register_task(2, "Sentiment")
-        self.register_task(3, "Summarization")
-        self.register_task(5, "LangDetect")
-        self.register_task(7, "EntityExtract")
-        self.register_task(11, "Q&A")
-        self.register_task(13, "Classify")
-        self.register_task(17, "Translate")
-        self.register_task(19, "Moderate")
-        self.register_task(23, "Keywords")
-        self.register_task(29, "Readability")
-
-        # Register default fibonacci (parameters) to match MathProtocol.PARAMS
-        self.register_parameter(1, "Brief")
-        self.register_parameter(2, "Medium")
-        self.register_parameter(3, "Detailed")
-        self.register_parameter(5, "JSON")
-        self.register_parameter(8, "List")
-        self.register_parameter(13, "Confidence")
-        self.register_parameter(21, "Explain")
-        # Extended parameters not in original PARAMS
-        self.register_parameter(34, "INCLUDE_CITATIONS")
-        self.register_parameter(55, "REDACT_PII")
-        self.register_parameter(89, "MAX_PRECISION")
-
-        # Register default powers of 2 (responses) to match MathProtocol.RESPONSES
-        # Success Bit (mandatory in v2.1, treated separately from semantic flags)
-        self.register_response(1, "SUCCESS_BIT")
-        # Semantic response flags (must align with MathProtocol.RESPONSES)
-        self.register_response(2, "Positive")
-        self.register_response(4, "Negative")
-        self.register_response(8, "Neutral")
-        self.register_response(16, "English")
-        self.register_response(32, "Spanish")
-        self.register_response(64, "French")
-        self.register_response(128, "HighConf")
-        self.register_response(256, "MedConf")
-        self.register_response(512, "LowConf")
+        """
+        Initialize default protocol mappings.
+        
+        The defaults are known-good codes, so they are copied in bulk
+        rather than validated one register_* call at a time.
+        """
+        self.tasks = dict(_DEFAULT_TASKS)
+        self.parameters = dict(_DEFAULT_PARAMETERS)
+        self.responses = dict(_DEFAULT_RESPONSES)
+        self._reset_flag_tables()
 
     def reset(self):
         """Reset registry to default state (primarily for testing)."""
-        self.tasks = {}
-        self.parameters = {}
-        self.responses = {}
         self._initialize_defaults()
 
+    def _reset_flag_tables(self):
+        """
+        Rebuild the lookup tables derived from self.responses.
+        
+        get_response_flags memoizes by the code masked to registered bits,
+        so the cache holds at most 2**len(responses) entries.
+        """
+        self._response_items = tuple(self.responses.items())
+        self._flag_mask = 0
+        for power in self.responses:
+            self._flag_mask |= power
+        # Flag name by bit index, for walking only the set bits of a code
+        self._bit_names: List[Optional[str]] = [None] * self._flag_mask.bit_length()
+        for power, name in self._response_items:
+            self._bit_names[power.bit_length() - 1] = name
+        # Flags are reported in registration order; the bit walk yields
+        # ascending powers, so it applies only when those orders agree
+        powers = list(self.responses)
+        self._flags_ascending = powers == sorted(powers)
+        self._flag_cache: Dict[int, Tuple[str, ...]] = {}
+
     def register_task(self, prime: int, name: str):
         """
         Register a new task code.
@@ -91,20 +145,18 @@ class ProtocolRegistry:
             
         Raises:
             ValueError: If the provided number is not prime or not in the
-                predefined MathProtocol.PRIMES task set (when protocol is loaded).
+                predefined MathProtocol.PRIMES task set.
         """
-        if not self._is_prime(prime):
-            raise ValueError(f"Task ID {prime} must be a prime number.")
         # Enforce that task codes stay within the core protocol's prime set
-        # to maintain strict, deterministic validation.
-        # Only validate against PRIMES if MathProtocol class exists (avoid circular import during init)
-        if 'MathProtocol' in globals():
-            MP = globals()['MathProtocol']
-            if prime not in MP.PRIMES:
-                raise ValueError(
-                    f"Task ID {prime} is not a valid protocol task code. "
-                    f"Valid task IDs are: {sorted(MP.PRIMES)}"
-                )
+        # to maintain strict, deterministic validation. Every member is
+        # prime, so valid codes need only this one lookup.
+        if prime not in _PROTOCOL_PRIMES:
+            if not self._is_prime(prime):
+                raise ValueError(f"Task ID {prime} must be a prime number.")
+            raise ValueError(
+                f"Task ID {prime} is not a valid protocol task code. "
+                f"Valid task IDs are: {sorted(_PROTOCOL_PRIMES)}"
+            )
         self.tasks[prime] = name
 
     def register_parameter(self, fib: int, name: str):
@@ -140,6 +192,7 @@ class ProtocolRegistry:
         if not (power > 0 and (power & (power - 1)) == 0):
             raise ValueError(f"Response ID {power} must be a power of 2.")
         self.responses[power] = name
+        self._reset_flag_tables()
     
     def get_task_name(self, prime: int) -> str:
         """Get the name of a registered task."""
@@ -159,11 +212,46 @@ class ProtocolRegistry:
         Returns:
             List of flag names that are set in the code
         """
-        flags = []
-        for power, name in self.responses.items():
-            if code & power:
-                flags.append(name)
-        return flags
+        key = code & self._flag_mask
+        flags = self._flag_cache.get(key)
+        if flags is None:
+            if self._flags_ascending:
+                # One iteration per set bit: isolate the lowest, then clear it
+                names = self._bit_names
+                found = []
+                rest = key
+                while rest:
+                    bit = rest & -rest
+                    found.append(names[bit.bit_length() - 1])
+                    rest ^= bit
+                flags = tuple(found)
+            else:
+                flags = tuple(name for power, name in self._response_items if key & power)
+            self._flag_cache[key] = flags
+        # A fresh list, so callers can't alter the cached entry
+        return list(flags)
+
+    def get_response_flags_batch(self, codes: Iterable[int]) -> List[List[str]]:
+        """
+        Decode many response codes at once.
+        
+        Uses the same memo table as get_response_flags, so a batch costs
+        one dict lookup per code plus one decode per distinct flag set.
+        
+        Args:
+            codes: Integer response codes
+            
+        Returns:
+            One list of flag names per code, in order
+        """
+        mask = self._flag_mask
+        cache = self._flag_cache
+        decode = self.get_response_flags
+        results = []
+        for code in codes:
+            flags = cache.get(code & mask)
+            results.append(decode(code) if flags is None else list(flags))
+        return results
 
     @staticmethod
     def _is_prime(n: int) -> bool:
@@ -205,11 +293,11 @@ class MathProtocol:
       128=HighConf, 256=MedConf, 512=LowConf
     """
     
-    # Mathematical sets
-    PRIMES = {2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97}
-    FIBONACCI = {1, 2, 3, 5, 8, 13, 21, 34, 55, 89}
+    # Mathematical sets (frozen: built once, never mutated)
+    PRIMES = _PROTOCOL_PRIMES
+    FIBONACCI = frozenset({1, 2, 3, 5, 8, 13, 21, 34, 55, 89})
     # v2.1: Added 1 (Success Bit) to powers of 2
-    POWERS_OF_2 = {1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096}
+    POWERS_OF_2 = frozenset({1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096})
     
     # Task mappings
     TASKS = {
@@ -253,10 +341,20 @@ class MathProtocol:
     ERROR_INVALID_TASK = 1024
     ERROR_INVALID_PARAM = 2048
     ERROR_INVALID_FORMAT = 4096
+    # Error codes as transmitted (response strings)
+    ERROR_INVALID_TASK_STR = str(ERROR_INVALID_TASK)
+    ERROR_INVALID_PARAM_STR = str(ERROR_INVALID_PARAM)
+    ERROR_INVALID_FORMAT_STR = str(ERROR_INVALID_FORMAT)
     
     # Task types
-    CLASSIFICATION_TASKS = {2, 5, 13, 19, 29}  # No payload
-    GENERATIVE_TASKS = {3, 7, 11, 17, 23}  # Requires payload
+    CLASSIFICATION_TASKS = frozenset({2, 5, 13, 19, 29})  # No payload
+    GENERATIVE_TASKS = frozenset({3, 7, 11, 17, 23})  # Requires payload
+    
+    # Response code sets checked by validate_response
+    _ERROR_CODES = frozenset({ERROR_INVALID_TASK, ERROR_INVALID_PARAM, ERROR_INVALID_FORMAT})
+    # Base response codes (Success Bit removed): 0 (just success) or a semantic flag
+    _VALID_BASES = frozenset({0, 2, 4, 8, 16, 32, 64})
+    _CONFIDENCE_CODES = frozenset({128, 256, 512})
     
     def __init__(self):
         """Initialize MathProtocol with registry reference."""
@@ -276,24 +374,67 @@ class MathProtocol:
         Returns:
             Formatted protocol prompt string
         """
+        # Only exact ints are memoized: equal values of other types (1.0,
+        # True) render differently, and other containers may not be hashable
+        if (type(task_prime) is int and type(params_fib) is list
+                and all(type(p) is int for p in params_fib)):
+            prefix, suffix = self._prompt_parts(task_prime, tuple(params_fib))
+        else:
+            prefix, suffix = self._build_prompt_parts(task_prime, params_fib)
+        return f"{prefix}{context}{suffix}"
+
+    @staticmethod
+    @lru_cache(maxsize=1024, typed=True)
+    def _prompt_parts(task_prime: int, params: Tuple[int, ...]) -> Tuple[str, str]:
+        """
+        Memoized _build_prompt_parts for an int task and a list of int params.
+        
+        Only the context varies between requests, so the rest of the prompt
+        is memoized per (task, params) combination.
+        
+        Args:
+            task_prime: Prime number identifying the task
+            params: Fibonacci parameters as a tuple (hashable)
+            
+        Returns:
+            Tuple of (prefix, suffix) to place around the context
+        """
+        return MathProtocol._build_prompt_parts(task_prime, list(params))
+
+    @staticmethod
+    def _build_prompt_parts(task_prime: int, params_fib: List[int]) -> Tuple[str, str]:
+        """
+        Build the static text around the context for a task/params pair.
+        
+        Args:
+            task_prime: Prime number identifying the task
+            params_fib: Fibonacci parameters, rendered as given
+            
+        Returns:
+            Tuple of (prefix, suffix) to place around the context
+        """
         fib_sum = sum(params_fib) if params_fib else 1
         checksum = task_prime * fib_sum
+        # Rendered once, used in both the header and the instruction
+        params_repr = f"{params_fib}"
         
-        prompt = (
+        prefix = (
             f"MATHPROTOCOL_V2_REQUEST\n"
             f"TASK_PRIME: {task_prime}\n"
-            f"PARAM_FIB: {params_fib}\n"
+            f"PARAM_FIB: {params_repr}\n"
             f"CHECKSUM: {checksum}\n"
             f"DATA_START\n"
-            f"{context}\n"
+        )
+        suffix = (
+            f"\n"
             f"DATA_END\n"
-            f"INSTRUCTION: Execute TASK {task_prime} with modifiers {params_fib}. "
+            f"INSTRUCTION: Execute TASK {task_prime} with modifiers {params_repr}. "
             f"Respond strictly in MathProtocol response format: "
             f"\"<response_code>-<confidence>\" for classification tasks (no payload) "
             f"or \"<response_code>-<confidence> | <payload>\" for generative tasks. "
             f"Use only the defined integer codes and output nothing else."
         )
-        return prompt
+        return prefix, suffix
 
     def decode_response(self, response_int: int) -> Dict[str, Any]:
         """
@@ -326,12 +467,9 @@ class MathProtocol:
         Returns:
             True if all codes are registered, False otherwise
         """
-        if task_prime not in self.registry.tasks:
-            return False
-        for p in params_fib:
-            if p not in self.registry.parameters:
-                return False
-        return True
+        registry = self.registry
+        # Subset test on the keys view runs in C without copying the dict
+        return task_prime in registry.tasks and registry.parameters.keys() >= set(params_fib)
     
     # === EXISTING V1 METHODS - PRESERVED FOR BACKWARD COMPATIBILITY ===
     
@@ -346,31 +484,7 @@ class MathProtocol:
         Returns:
             bool: True if valid format, False otherwise
         """
-        if not input_str or not isinstance(input_str, str):
-            return False
-        
-        # Pattern: TASK-PARAM with optional | CONTEXT
-        # Use atomic grouping to prevent catastrophic backtracking (ReDoS)
-        # The non-capturing group (?:...) with explicit character limits prevents
-        # exponential backtracking when matching whitespace around the pipe
-        pattern = r'^(\d+)-(\d+)(?:\s{0,10}\|\s{0,10}(.+))?$'
-        match = re.match(pattern, input_str)
-        
-        if not match:
-            return False
-        
-        task = int(match.group(1))
-        param = int(match.group(2))
-        
-        # Validate task is a prime in our set
-        if task not in self.PRIMES or task not in self.TASKS:
-            return False
-        
-        # Validate param is a Fibonacci number in our set
-        if param not in self.FIBONACCI:
-            return False
-        
-        return True
+        return self._match_and_extract(input_str) is not None
     
     def parse_input(self, input_str: str) -> Optional[Dict[str, Union[int, str]]]:
         """
@@ -382,25 +496,51 @@ class MathProtocol:
         Returns:
             Dict with 'task', 'param', and 'context' keys, or None if invalid
         """
-        if not self.validate_input(input_str):
+        extracted = self._match_and_extract(input_str)
+        if extracted is None:
             return None
         
-        # Extract components
-        if '|' in input_str:
-            codes, context = input_str.split('|', 1)
-            context = context.strip()
-        else:
-            codes = input_str
-            context = ""
-        
-        task, param = map(int, codes.split('-'))
-        
+        task, param, context = extracted
         return {
             'task': task,
             'param': param,
             'context': context
         }
     
+    def _match_and_extract(self, input_str: str) -> Optional[Tuple[int, int, str]]:
+        """
+        Validate and parse an input string in a single regex pass.
+        
+        Args:
+            input_str: The input string to check
+            
+        Returns:
+            Tuple of (task, param, context), or None if invalid
+        """
+        if not input_str or not isinstance(input_str, str):
+            return None
+        
+        # Pattern: TASK-PARAM with optional | CONTEXT (see _INPUT_RE)
+        match = _INPUT_RE.match(input_str)
+        
+        if not match:
+            return None
+        
+        task_str, param_str, context = match.groups()
+        task = int(task_str)
+        param = int(param_str)
+        
+        # Validate task is a prime in our set
+        if task not in self.PRIMES or task not in self.TASKS:
+            return None
+        
+        # Validate param is a Fibonacci number in our set
+        if param not in self.FIBONACCI:
+            return None
+        
+        # The group starts after the first pipe; only whitespace is trimmed
+        return task, param, context.strip() if context else ""
+    
     def parse_response(self, response_str: str) -> Dict[str, Union[List[int], str]]:
         """
         Parse an LLM response into codes and payload.
@@ -414,22 +554,37 @@ class MathProtocol:
         if not response_str or not isinstance(response_str, str):
             return {"codes": [], "payload": ""}
         
-        # Check if response contains a pipe (has payload)
-        if '|' in response_str:
-            codes_part, payload = response_str.split('|', 1)
-            payload = payload.strip()
-        else:
-            codes_part = response_str
-            payload = ""
-        
-        # Extract all numbers from codes part
-        codes = [int(x) for x in re.findall(r'\d+', codes_part)]
-        
+        codes, payload = self._split_response(response_str)
         return {
             "codes": codes,
             "payload": payload
         }
     
+    @staticmethod
+    def _split_response(response_str: str) -> Tuple[List[int], str]:
+        """
+        Split a response string into its integer codes and payload.
+        
+        Args:
+            response_str: Non-empty response string
+            
+        Returns:
+            Tuple of (codes, payload)
+        """
+        # Text after the first pipe (if any) is the payload
+        codes_part, _, payload = response_str.partition('|')
+        payload = payload.strip()
+        
+        # Well-formed codes are dash-separated digit runs; int() them
+        # directly and only fall back to extracting every digit run
+        codes = []
+        for part in codes_part.split('-'):
+            part = part.strip()
+            if not part.isdecimal():  # Exactly the characters \d matches
+                return [int(x) for x in _DIGITS_RE.findall(codes_part)], payload
+            codes.append(int(part))
+        return codes, payload
+    
     def validate_response(self, response_str: str, task_code: int) -> bool:
         """
         Validate if a response matches protocol rules for the given task.
@@ -453,37 +608,27 @@ class MathProtocol:
         Returns:
             bool: True if valid response, False otherwise
         """
-        parsed = self.parse_response(response_str)
-        codes = parsed["codes"]
-        payload = parsed["payload"]
+        if not response_str or not isinstance(response_str, str):
+            return False  # No codes at all
+        codes, payload = self._split_response(response_str)
         
         # Error codes should be alone (and don't require Success Bit)
-        if len(codes) == 1 and codes[0] in {1024, 2048, 4096}:
+        if len(codes) == 1 and codes[0] in self._ERROR_CODES:
             return payload == ""  # Error codes should have no payload
         
         # Normal responses should have exactly 2 codes (response + confidence)
         if len(codes) != 2:
             return False
         
-        response_val = codes[0]
-        confidence_val = codes[1]
+        response_val, confidence_val = codes
         
-        # v2.1: Check Success Bit (bit 0 must be set - number must be odd)
-        if not (response_val & 1):
-            return False  # Missing Success Bit!
-        
-        # Remove Success Bit to validate the base code
-        base_code = response_val - 1
-        
-        # Base code must be a valid power of 2 or 0
-        # Valid bases: 0 (just success), 2, 4, 8, 16, 32, 64
-        valid_bases = {0, 2, 4, 8, 16, 32, 64}
-        if base_code not in valid_bases:
+        # v2.1: Check Success Bit (bit 0 must be set - number must be odd),
+        # then clear it; the base code must be a valid power of 2 or 0
+        if not (response_val & 1) or (response_val ^ 1) not in self._VALID_BASES:
             return False
         
         # Confidence code must be valid
-        CONFIDENCE_CODES = {128, 256, 512}
-        if confidence_val not in CONFIDENCE_CODES:
+        if confidence_val not in self._CONFIDENCE_CODES:
             return False
         
         # Classification tasks must NOT have payload
@@ -496,6 +641,20 @@ class MathProtocol:
         
         return True
     
+    def validate_response_batch(self, responses: Iterable[str],
+                                task_codes: Iterable[int]) -> List[bool]:
+        """
+        Validate many responses, each against its paired task code.
+        
+        Args:
+            responses: Response strings from the LLM
+            task_codes: Task code for each response, in the same order
+            
+        Returns:
+            One validation result per (response, task code) pair
+        """
+        return list(map(self.validate_response, responses, task_codes))
+    
     def get_task_name(self, task_code: int) -> Optional[str]:
         """Get the name of a task from its code."""
         return self.TASKS.get(task_code)
@@ -516,8 +675,30 @@ class MockLLM:
     This allows testing the protocol logic without requiring an actual LLM API.
     """
     
+    # Keyword lists, matched as substrings of the lowercased context
+    _POSITIVE_WORDS = ('good', 'great', 'amazing', 'excellent', 'love')
+    _NEGATIVE_WORDS = ('bad', 'terrible', 'awful', 'hate', 'worst')
+    _SPANISH_WORDS = ('hola', 'mundo', 'gracias', 'por', 'favor')
+    _FRENCH_WORDS = ('bonjour', 'monde', 'merci', 'oui', 'non')
+    _UNSAFE_WORDS = ('violence', 'hate', 'explicit')
+    # Capitalized words that are never reported as entities
+    _ENTITY_STOPWORDS = frozenset({'The', 'A', 'An'})
+    
     def __init__(self):
         self.protocol = MathProtocol()
+        # Task code -> response generator taking (param, context)
+        self._handlers = {
+            2: self._gen_sentiment,
+            3: self._gen_summarize,
+            5: self._gen_langdetect,
+            7: self._gen_entities,
+            11: self._gen_qa,
+            13: self._gen_classify,
+            17: self._gen_translate,
+            19: self._gen_moderate,
+            23: self._gen_keywords,
+            29: self._gen_readability,
+        }
     
     def process(self, input_str: str) -> str:
         """
@@ -529,30 +710,28 @@ class MockLLM:
         Returns:
             str: The response in protocol format
         """
-        # Parse input
-        parsed = self.protocol.parse_input(input_str)
+        # Parse input straight to (task, param, context), skipping
+        # parse_input's dict
+        extracted = self.protocol._match_and_extract(input_str)
         
-        if parsed is None:
+        if extracted is None:
             # Determine specific error
-            if not input_str or not re.match(r'^\d+-\d+', input_str):
-                return str(MathProtocol.ERROR_INVALID_FORMAT)
+            match = _INPUT_CODES_RE.match(input_str) if input_str else None
+            if not match:
+                return MathProtocol.ERROR_INVALID_FORMAT_STR
             
-            # Extract codes to check which is invalid
-            match = re.match(r'^(\d+)-(\d+)', input_str)
-            if match:
-                task = int(match.group(1))
-                param = int(match.group(2))
-                
-                if task not in MathProtocol.PRIMES or task not in MathProtocol.TASKS:
-                    return str(MathProtocol.ERROR_INVALID_TASK)
-                if param not in MathProtocol.FIBONACCI:
-                    return str(MathProtocol.ERROR_INVALID_PARAM)
+            # Check which of the extracted codes is invalid
+            task = int(match.group(1))
+            param = int(match.group(2))
             
-            return str(MathProtocol.ERROR_INVALID_FORMAT)
+            if task not in MathProtocol.PRIMES or task not in MathProtocol.TASKS:
+                return MathProtocol.ERROR_INVALID_TASK_STR
+            if param not in MathProtocol.FIBONACCI:
+                return MathProtocol.ERROR_INVALID_PARAM_STR
+            
+            return MathProtocol.ERROR_INVALID_FORMAT_STR
         
-        task = parsed['task']
-        param = parsed['param']
-        context = parsed['context']
+        task, param, context = extracted
         
         # Simulate task-specific responses
         return self._generate_response(task, param, context)
@@ -563,263 +742,197 @@ class MockLLM:
         
         Version 2.1: All responses include the Success Bit (+1 to base code).
         """
-        
-        # Task 2: Sentiment Analysis
-        if task == 2:
-            # Simple keyword-based sentiment
-            context_lower = context.lower()
-            if any(word in context_lower for word in ['good', 'great', 'amazing', 'excellent', 'love']):
-                return "3-128"  # 2 Positive + 1 Success Bit
-            elif any(word in context_lower for word in ['bad', 'terrible', 'awful', 'hate', 'worst']):
-                return "5-128"  # 4 Negative + 1 Success Bit
-            else:
-                return "9-128"  # 8 Neutral + 1 Success Bit
-        
-        # Task 3: Summarization
-        elif task == 3:
-            words = context.split()
-            if param == 1:  # Brief
-                summary = ' '.join(words[:5]) + "..."
-            elif param == 2:  # Medium
-                summary = ' '.join(words[:10]) + "..."
-            else:  # Detailed
-                summary = ' '.join(words[:15]) + "..."
-            return f"17-128 | {summary}"  # 16 English + 1 Success Bit
-        
-        # Task 5: Language Detection
-        elif task == 5:
-            context_lower = context.lower()
-            # Simple keyword-based detection
-            spanish_words = ['hola', 'mundo', 'gracias', 'por', 'favor']
-            french_words = ['bonjour', 'monde', 'merci', 'oui', 'non']
-            
-            if any(word in context_lower for word in spanish_words):
-                return "33-128"  # 32 Spanish + 1 Success Bit
-            elif any(word in context_lower for word in french_words):
-                return "65-128"  # 64 French + 1 Success Bit
-            else:
-                return "17-128"  # 16 English + 1 Success Bit
-        
-        # Task 7: Entity Extraction
-        elif task == 7:
-            # Simple capitalized word extraction
-            words = context.split()
-            entities = [w for w in words if w and w[0].isupper() and w not in ['The', 'A', 'An']]
-            if param == 8:  # List format
-                result = ', '.join(entities[:5])
-            else:
-                result = ' '.join(entities[:3])
-            return f"17-128 | {result}"  # 16 English + 1 Success Bit
-        
-        # Task 11: Q&A
-        elif task == 11:
-            # Simple mock answers
-            if 'capital' in context.lower() and 'france' in context.lower():
-                return "17-128 | Paris"  # 16 English + 1 Success Bit
-            elif 'color' in context.lower() and 'sky' in context.lower():
-                return "17-128 | Blue"  # 16 English + 1 Success Bit
-            else:
-                return "17-128 | Answer not available"  # 16 English + 1 Success Bit
-        
-        # Task 13: Classification
-        elif task == 13:
-            # Generic classification as neutral
+        return self._handlers.get(task, self._gen_default)(param, context)
+    
+    def _gen_sentiment(self, param: int, context: str) -> str:
+        """Task 2: Sentiment Analysis."""
+        # Simple keyword-based sentiment
+        context_lower = context.lower()
+        if any(word in context_lower for word in self._POSITIVE_WORDS):
+            return "3-128"  # 2 Positive + 1 Success Bit
+        elif any(word in context_lower for word in self._NEGATIVE_WORDS):
+            return "5-128"  # 4 Negative + 1 Success Bit
+        else:
             return "9-128"  # 8 Neutral + 1 Success Bit
-        
-        # Task 17: Translation
-        elif task == 17:
-            # Simple mock translations
-            context_lower = context.lower()
-            if 'hello' in context_lower or 'hi' in context_lower:
-                return "33-128 | Hola"  # 32 Spanish + 1 Success Bit
-            elif 'world' in context_lower:
-                return "33-128 | Mundo"  # 32 Spanish + 1 Success Bit
-            elif 'thank' in context_lower:
-                return "33-128 | Gracias"  # 32 Spanish + 1 Success Bit
-            else:
-                return "33-128 | [traducción]"  # 32 Spanish + 1 Success Bit
-        
-        # Task 19: Content Moderation
-        elif task == 19:
-            # Simple safety check
-            unsafe_words = ['violence', 'hate', 'explicit']
-            if any(word in context.lower() for word in unsafe_words):
-                return "5-128"  # 4 Negative (unsafe) + 1 Success Bit
-            else:
-                return "9-128"  # 8 Neutral (safe) + 1 Success Bit
-        
-        # Task 23: Keyword Extraction
-        elif task == 23:
-            # Extract first few words as keywords
-            words = [w.strip('.,!?') for w in context.split()]
-            keywords = ', '.join(words[:5])
-            return f"17-128 | {keywords}"  # 16 English + 1 Success Bit
-        
-        # Task 29: Readability
-        elif task == 29:
-            # Simple readability: positive if short words
-            avg_word_length = sum(len(w) for w in context.split()) / max(len(context.split()), 1)
-            if avg_word_length < 5:
-                return "3-128"  # 2 Positive (easy to read) + 1 Success Bit
-            elif avg_word_length > 8:
-                return "5-128"  # 4 Negative (hard to read) + 1 Success Bit
-            else:
-                return "9-128"  # 8 Neutral (medium) + 1 Success Bit
-        
-        # Default fallback
+    
+    def _gen_summarize(self, param: int, context: str) -> str:
+        """Task 3: Summarization."""
+        if param == 1:  # Brief
+            limit = 5
+        elif param == 2:  # Medium
+            limit = 10
+        else:  # Detailed
+            limit = 15
+        # Split off only the words the summary keeps
+        summary = ' '.join(context.split(None, limit)[:limit]) + "..."
+        return f"17-128 | {summary}"  # 16 English + 1 Success Bit
+    
+    def _gen_langdetect(self, param: int, context: str) -> str:
+        """Task 5: Language Detection."""
+        context_lower = context.lower()
+        # Simple keyword-based detection
+        if any(word in context_lower for word in self._SPANISH_WORDS):
+            return "33-128"  # 32 Spanish + 1 Success Bit
+        elif any(word in context_lower for word in self._FRENCH_WORDS):
+            return "65-128"  # 64 French + 1 Success Bit
+        else:
+            return "17-128"  # 16 English + 1 Success Bit
+    
+    def _gen_entities(self, param: int, context: str) -> str:
+        """Task 7: Entity Extraction."""
+        # Simple capitalized word extraction, stopping once enough are found
+        if param == 8:  # List format
+            limit, sep = 5, ', '
+        else:
+            limit, sep = 3, ' '
+        stopwords = self._ENTITY_STOPWORDS
+        entities = islice(
+            (w for w in context.split() if w[0].isupper() and w not in stopwords), limit
+        )
+        result = sep.join(entities)
+        return f"17-128 | {result}"  # 16 English + 1 Success Bit
+    
+    def _gen_qa(self, param: int, context: str) -> str:
+        """Task 11: Q&A."""
+        # Simple mock answers
+        context_lower = context.lower()
+        if 'capital' in context_lower and 'france' in context_lower:
+            return "17-128 | Paris"  # 16 English + 1 Success Bit
+        elif 'color' in context_lower and 'sky' in context_lower:
+            return "17-128 | Blue"  # 16 English + 1 Success Bit
+        else:
+            return "17-128 | Answer not available"  # 16 English + 1 Success Bit
+    
+    def _gen_classify(self, param: int, context: str) -> str:
+        """Task 13: Classification."""
+        # Generic classification as neutral
         return "9-128"  # 8 Neutral + 1 Success Bit
-
-
-def run_tests():
-    """
-    Run comprehensive test cases for MathProtocol.
     
-    Tests include:
-    - Input validation
-    - Response parsing
-    - Classification tasks
-    - Generative tasks
-    - Error handling
-    - MockLLM behavior
-    """
-    protocol = MathProtocol()
-    mock_llm = MockLLM()
+    def _gen_translate(self, param: int, context: str) -> str:
+        """Task 17: Translation."""
+        # Simple mock translations
+        context_lower = context.lower()
+        if 'hello' in context_lower or 'hi' in context_lower:
+            return "33-128 | Hola"  # 32 Spanish + 1 Success Bit
+        elif 'world' in context_lower:
+            return "33-128 | Mundo"  # 32 Spanish + 1 Success Bit
+        elif 'thank' in context_lower:
+            return "33-128 | Gracias"  # 32 Spanish + 1 Success Bit
+        else:
+            return "33-128 | [traducción]"  # 32 Spanish + 1 Success Bit
     
-    print("=" * 60)
-    print("MathProtocol Test Suite")
-    print("=" * 60)
+    def _gen_moderate(self, param: int, context: str) -> str:
+        """Task 19: Content Moderation."""
+        # Simple safety check
+        context_lower = context.lower()
+        if any(word in context_lower for word in self._UNSAFE_WORDS):
+            return "5-128"  # 4 Negative (unsafe) + 1 Success Bit
+        else:
+            return "9-128"  # 8 Neutral (safe) + 1 Success Bit
     
-    test_count = 0
-    passed_count = 0
+    def _gen_keywords(self, param: int, context: str) -> str:
+        """Task 23: Keyword Extraction."""
+        # Extract first few words as keywords
+        words = [w.strip('.,!?') for w in context.split(None, 5)[:5]]
+        keywords = ', '.join(words)
+        return f"17-128 | {keywords}"  # 16 English + 1 Success Bit
+    
+    def _gen_readability(self, param: int, context: str) -> str:
+        """Task 29: Readability."""
+        # Simple readability: positive if short words
+        words = context.split()
+        avg_word_length = sum(map(len, words)) / (len(words) or 1)
+        if avg_word_length < 5:
+            return "3-128"  # 2 Positive (easy to read) + 1 Success Bit
+        elif avg_word_length > 8:
+            return "5-128"  # 4 Negative (hard to read) + 1 Success Bit
+        else:
+            return "9-128"  # 8 Neutral (medium) + 1 Success Bit
     
-    # Test 1: Valid input validation
-    test_count += 1
-    print(f"\nTest {test_count}: Valid Input Validation")
+    def _gen_default(self, param: int, context: str) -> str:
+        """Fallback for tasks without a dedicated generator."""
+        return "9-128"  # 8 Neutral + 1 Success Bit
+
+
+def _test_valid_inputs(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
     valid_inputs = [
         "2-1 | Good product",
         "17-2 | Hello World",
         "3-1 | Long text here",
         "5-1 | Bonjour"
     ]
-    all_valid = all(protocol.validate_input(inp) for inp in valid_inputs)
-    print(f"Result: {'PASS' if all_valid else 'FAIL'}")
-    if all_valid:
-        passed_count += 1
-    
-    # Test 2: Invalid input validation
-    test_count += 1
-    print(f"\nTest {test_count}: Invalid Input Validation")
+    return all(protocol.validate_input(inp) for inp in valid_inputs)
+
+
+def _test_invalid_inputs(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
     invalid_inputs = [
         "4-1 | Text",  # 4 is not prime in our set
         "2-4 | Text",  # 4 is not Fibonacci
         "Hello",  # Wrong format
         "2-1-1 | Text"  # Too many dashes
     ]
-    all_invalid = all(not protocol.validate_input(inp) for inp in invalid_inputs)
-    print(f"Result: {'PASS' if all_invalid else 'FAIL'}")
-    if all_invalid:
-        passed_count += 1
-    
-    # Test 3: Input parsing
-    test_count += 1
-    print(f"\nTest {test_count}: Input Parsing")
+    return all(not protocol.validate_input(inp) for inp in invalid_inputs)
+
+
+def _test_input_parsing(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
     parsed = protocol.parse_input("17-1 | Hello World")
-    correct_parse = (parsed is not None and 
-                     parsed['task'] == 17 and 
-                     parsed['param'] == 1 and 
-                     parsed['context'] == "Hello World")
-    print(f"Parsed: {parsed}")
-    print(f"Result: {'PASS' if correct_parse else 'FAIL'}")
-    if correct_parse:
-        passed_count += 1
-    
-    # Test 4: Response parsing
-    test_count += 1
-    print(f"\nTest {test_count}: Response Parsing")
+    log(f"Parsed: {parsed}")
+    return (parsed is not None and 
+            parsed['task'] == 17 and 
+            parsed['param'] == 1 and 
+            parsed['context'] == "Hello World")
+
+
+def _test_response_parsing(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
     parsed_resp = protocol.parse_response("32-128 | Hola Mundo")
-    correct_resp = (parsed_resp['codes'] == [32, 128] and 
-                    parsed_resp['payload'] == "Hola Mundo")
-    print(f"Parsed: {parsed_resp}")
-    print(f"Result: {'PASS' if correct_resp else 'FAIL'}")
-    if correct_resp:
-        passed_count += 1
-    
-    # Test 5: Sentiment Analysis (Classification - No Payload)
-    test_count += 1
-    print(f"\nTest {test_count}: Sentiment Analysis")
-    response = mock_llm.process("2-1 | This product is amazing!")
-    print(f"Input: 2-1 | This product is amazing!")
-    print(f"Output: {response}")
+    log(f"Parsed: {parsed_resp}")
+    return (parsed_resp['codes'] == [32, 128] and 
+            parsed_resp['payload'] == "Hola Mundo")
+
+
+def _run_mock(mock_llm: MockLLM, input_str: str, log) -> str:
+    """Process input_str with the mock LLM, logging input and output."""
+    response = mock_llm.process(input_str)
+    log(f"Input: {input_str}")
+    log(f"Output: {response}")
+    return response
+
+
+def _test_sentiment(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    response = _run_mock(mock_llm, "2-1 | This product is amazing!", log)
     # v2.1: Expecting 3-128 (2 Positive + 1 Success Bit)
-    valid_sentiment = protocol.parse_response(response)['codes'] == [3, 128]
-    print(f"Result: {'PASS' if valid_sentiment else 'FAIL'}")
-    if valid_sentiment:
-        passed_count += 1
-    
-    # Test 6: Translation (Generative - Requires Payload)
-    test_count += 1
-    print(f"\nTest {test_count}: Translation")
-    response = mock_llm.process("17-1 | Hello")
-    print(f"Input: 17-1 | Hello")
-    print(f"Output: {response}")
+    return protocol.parse_response(response)['codes'] == [3, 128]
+
+
+def _test_translation(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    response = _run_mock(mock_llm, "17-1 | Hello", log)
     parsed = protocol.parse_response(response)
-    valid_translation = (len(parsed['codes']) >= 2 and 
-                        parsed['payload'] != "")
-    print(f"Result: {'PASS' if valid_translation else 'FAIL'}")
-    if valid_translation:
-        passed_count += 1
-    
-    # Test 7: Error - Invalid Task
-    test_count += 1
-    print(f"\nTest {test_count}: Invalid Task Error")
-    response = mock_llm.process("4-1 | Text")
-    print(f"Input: 4-1 | Text")
-    print(f"Output: {response}")
-    valid_error = response == "1024"
-    print(f"Result: {'PASS' if valid_error else 'FAIL'}")
-    if valid_error:
-        passed_count += 1
-    
-    # Test 8: Error - Invalid Parameter
-    test_count += 1
-    print(f"\nTest {test_count}: Invalid Parameter Error")
-    response = mock_llm.process("2-4 | Text")
-    print(f"Input: 2-4 | Text")
-    print(f"Output: {response}")
-    valid_error = response == "2048"
-    print(f"Result: {'PASS' if valid_error else 'FAIL'}")
-    if valid_error:
-        passed_count += 1
-    
-    # Test 9: Error - Invalid Format
-    test_count += 1
-    print(f"\nTest {test_count}: Invalid Format Error")
-    response = mock_llm.process("Hello there")
-    print(f"Input: Hello there")
-    print(f"Output: {response}")
-    valid_error = response == "4096"
-    print(f"Result: {'PASS' if valid_error else 'FAIL'}")
-    if valid_error:
-        passed_count += 1
-    
-    # Test 10: Language Detection (Classification - No Payload)
-    test_count += 1
-    print(f"\nTest {test_count}: Language Detection")
-    response = mock_llm.process("5-1 | Bonjour le monde")
-    print(f"Input: 5-1 | Bonjour le monde")
-    print(f"Output: {response}")
+    return (len(parsed['codes']) >= 2 and 
+            parsed['payload'] != "")
+
+
+def _test_invalid_task_error(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    return _run_mock(mock_llm, "4-1 | Text", log) == "1024"
+
+
+def _test_invalid_param_error(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    return _run_mock(mock_llm, "2-4 | Text", log) == "2048"
+
+
+def _test_invalid_format_error(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    return _run_mock(mock_llm, "Hello there", log) == "4096"
+
+
+def _test_language_detection(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    response = _run_mock(mock_llm, "5-1 | Bonjour le monde", log)
     parsed = protocol.parse_response(response)
     # v2.1: Expecting 65-128 (64 French + 1 Success Bit)
-    valid_langdetect = (len(parsed['codes']) == 2 and 
-                       parsed['payload'] == "" and
-                       65 in parsed['codes'])  # 64 French + 1 Success Bit
-    print(f"Result: {'PASS' if valid_langdetect else 'FAIL'}")
-    if valid_langdetect:
-        passed_count += 1
-    
-    # Test 11: Response Validation
-    test_count += 1
-    print(f"\nTest {test_count}: Response Validation")
+    return (len(parsed['codes']) == 2 and 
+            parsed['payload'] == "" and
+            65 in parsed['codes'])  # 64 French + 1 Success Bit
+
+
+def _test_response_validation(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
     # v2.1: All responses must have Success Bit (odd numbers)
     # Classification task should not have payload
     valid1 = protocol.validate_response("3-128", 2)  # Valid (2+1 Success Bit)
@@ -830,31 +943,81 @@ def run_tests():
     # Missing Success Bit should fail
     valid5 = not protocol.validate_response("2-128", 2)  # Invalid (missing Success Bit)
     valid6 = not protocol.validate_response("16-128 | Text", 3)  # Invalid (missing Success Bit)
-    all_validation_correct = valid1 and valid2 and valid3 and valid4 and valid5 and valid6
-    print(f"Result: {'PASS' if all_validation_correct else 'FAIL'}")
-    if all_validation_correct:
-        passed_count += 1
-    
-    # Test 12: Q&A (Generative)
-    test_count += 1
-    print(f"\nTest {test_count}: Question Answering")
-    response = mock_llm.process("11-1 | What is the capital of France?")
-    print(f"Input: 11-1 | What is the capital of France?")
-    print(f"Output: {response}")
+    return valid1 and valid2 and valid3 and valid4 and valid5 and valid6
+
+
+def _test_question_answering(protocol: MathProtocol, mock_llm: MockLLM, log) -> bool:
+    response = _run_mock(mock_llm, "11-1 | What is the capital of France?", log)
     parsed = protocol.parse_response(response)
-    valid_qa = (len(parsed['codes']) >= 2 and 
-                parsed['payload'] != "" and
-                "Paris" in parsed['payload'])
-    print(f"Result: {'PASS' if valid_qa else 'FAIL'}")
-    if valid_qa:
-        passed_count += 1
+    return (len(parsed['codes']) >= 2 and 
+            parsed['payload'] != "" and
+            "Paris" in parsed['payload'])
+
+
+# Built-in checks, in run order: (title, check(protocol, mock_llm, log) -> bool)
+SELF_TESTS = (
+    ("Valid Input Validation", _test_valid_inputs),
+    ("Invalid Input Validation", _test_invalid_inputs),
+    ("Input Parsing", _test_input_parsing),
+    ("Response Parsing", _test_response_parsing),
+    ("Sentiment Analysis", _test_sentiment),
+    ("Translation", _test_translation),
+    ("Invalid Task Error", _test_invalid_task_error),
+    ("Invalid Parameter Error", _test_invalid_param_error),
+    ("Invalid Format Error", _test_invalid_format_error),
+    ("Language Detection", _test_language_detection),
+    ("Response Validation", _test_response_validation),
+    ("Question Answering", _test_question_answering),
+)
+
+
+def _quiet(*args, **kwargs):
+    """Log sink for run_tests(verbose=False)."""
+
+
+def run_tests(verbose: bool = True) -> bool:
+    """
+    Run comprehensive test cases for MathProtocol.
+    
+    Tests include:
+    - Input validation
+    - Response parsing
+    - Classification tasks
+    - Generative tasks
+    - Error handling
+    - MockLLM behavior
+    
+    Each check is a standalone function in SELF_TESTS, so a single one
+    can be imported and timed without the report output.
+    
+    Args:
+        verbose: Print the per-test report (False runs silently)
+    
+    Returns:
+        True if every test passed
+    """
+    protocol = MathProtocol()
+    mock_llm = MockLLM()
+    log = print if verbose else _quiet
+    
+    log("=" * 60)
+    log("MathProtocol Test Suite")
+    log("=" * 60)
+    
+    passed_count = 0
+    for test_count, (title, check) in enumerate(SELF_TESTS, 1):
+        log(f"\nTest {test_count}: {title}")
+        passed = check(protocol, mock_llm, log)
+        log(f"Result: {'PASS' if passed else 'FAIL'}")
+        if passed:
+            passed_count += 1
     
     # Summary
-    print("\n" + "=" * 60)
-    print(f"Test Results: {passed_count}/{test_count} passed")
-    print("=" * 60)
+    log("\n" + "=" * 60)
+    log(f"Test Results: {passed_count}/{len(SELF_TESTS)} passed")
+    log("=" * 60)
     
-    return passed_count == test_count
+    return passed_count == len(SELF_TESTS)
 
 
 if __name__ == "__main__":
@@ -115,6 +115,14 @@ def compose_prompt(protocol: MathProtocol, task: int, params: List[int], context
         params: List of parameter fibonacci numbers
         context: Context string or filepath (with @ prefix)
     """
+    # Validate request before any file I/O, so bad codes fail fast
+    if not protocol.validate_request(task, params):
+        print(f"❌ Error: Invalid task or parameters", file=sys.stderr)
+        print(f"\nTask {task}: {registry.get_task_name(task)}", file=sys.stderr)
+        for p in params:
+            print(f"Param {p}: {registry.get_parameter_name(p)}", file=sys.stderr)
+        sys.exit(1)
+    
     # Handle file input
     if context.startswith("@"):
         filepath = context[1:]
@@ -129,14 +137,6 @@ def compose_prompt(protocol: MathProtocol, task: int, params: List[int], context
             print(f"❌ Error reading file: {e}", file=sys.stderr)
             sys.exit(1)
     
-    # Validate request
-    if not protocol.validate_request(task, params):
-        print(f"❌ Error: Invalid task or parameters", file=sys.stderr)
-        print(f"\nTask {task}: {registry.get_task_name(task)}", file=sys.stderr)
-        for p in params:
-            print(f"Param {p}: {registry.get_parameter_name(p)}", file=sys.stderr)
-        sys.exit(1)
-    
     # Construct prompt
     prompt = protocol.construct_prompt(task, params, context)
     
@@ -31,5 +31,14 @@ setup(
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
         ],
+        "re2": [
+            "google-re2>=1.0",
+        ],
+        "blake3": [
+            "blake3>=0.3.0",
+        ],
+        "orjson": [
+            "orjson>=3.0",
+        ],
     },
 )
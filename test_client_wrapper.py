@@ -0,0 +1,158 @@
+"""
+Unit tests for the MathProtocol client wrapper.
+
+Run with: pytest test_client_wrapper.py -v
+"""
+
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from client_wrapper import MathProtocolClient
+from mathprotocol import MathProtocol, MockLLM
+
+
+def _openai_response(text):
+    """Minimal object shaped like an OpenAI chat completion."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class FakeAsyncOpenAI:
+    """
+    Async OpenAI stand-in answering with MockLLM.
+
+    Records the inputs it was sent and the most calls in flight at once.
+    Inputs listed in delays sleep that long; inputs in failures raise.
+    """
+
+    def __init__(self, delays=None, failures=()):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.mock_llm = MockLLM()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        input_str = kwargs["messages"][-1]["content"]
+        self.sent.append(input_str)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(input_str, 0.01))
+            if input_str in self.failures:
+                raise RuntimeError("rate limited")
+            return _openai_response(self.mock_llm.process(input_str))
+        finally:
+            self.in_flight -= 1
+
+
+class FakeSyncOpenAI:
+    """Sync OpenAI stand-in answering with MockLLM."""
+
+    def __init__(self):
+        self.mock_llm = MockLLM()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        time.sleep(0.01)
+        return _openai_response(self.mock_llm.process(kwargs["messages"][-1]["content"]))
+
+
+def _expected(input_str):
+    """Parsed MockLLM response for an input, as the client should return it."""
+    return MathProtocol().parse_response(MockLLM().process(input_str))
+
+
+class TestExecuteAsync(unittest.IsolatedAsyncioTestCase):
+    """Test suite for MathProtocolClient.execute_async."""
+
+    async def test_async_client_result(self):
+        """Test that execute_async returns the parsed response from the async client."""
+        fake = FakeAsyncOpenAI()
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        result = await client.execute_async(17, 1, "Hello")
+
+        self.assertEqual(result, _expected("17-1 | Hello"))
+        self.assertEqual(fake.sent, ["17-1 | Hello"])
+
+    async def test_sync_client_fallback(self):
+        """Test that execute_async runs the sync client when no async client is given."""
+        client = MathProtocolClient(FakeSyncOpenAI(), "model", "prompt")
+
+        result = await client.execute_async(2, 1, "I love it")
+
+        self.assertEqual(result, _expected("2-1 | I love it"))
+
+    async def test_invalid_input_not_sent(self):
+        """Test that invalid codes are rejected locally without a provider call."""
+        fake = FakeAsyncOpenAI()
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        result = await client.execute_async(4, 1, "Hello")
+
+        self.assertEqual(result["error"], MathProtocol.ERROR_INVALID_FORMAT)
+        self.assertEqual(fake.sent, [])
+
+    async def test_provider_error_returned(self):
+        """Test that a provider exception becomes a 500 result instead of raising."""
+        fake = FakeAsyncOpenAI(failures={"17-1 | Hello"})
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        result = await client.execute_async(17, 1, "Hello")
+
+        self.assertEqual(result["error"], 500)
+        self.assertIn("rate limited", result["message"])
+
+
+class TestExecuteMany(unittest.IsolatedAsyncioTestCase):
+    """Test suite for MathProtocolClient.execute_many."""
+
+    async def test_results_in_request_order(self):
+        """Test that results follow request order even when calls finish out of order."""
+        requests = [(17, 1, "first"), (2, 1, "second"), (3, 1, "third")]
+        fake = FakeAsyncOpenAI(delays={"17-1 | first": 0.05, "2-1 | second": 0.03})
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        results = await client.execute_many(requests)
+
+        self.assertEqual(results, [_expected(f"{t}-{p} | {c}") for t, p, c in requests])
+
+    async def test_concurrency_is_bounded(self):
+        """Test that calls overlap but never exceed max_concurrency."""
+        requests = [(17, 1, f"item {i}") for i in range(10)]
+        fake = FakeAsyncOpenAI()
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        results = await client.execute_many(requests, max_concurrency=3)
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(fake.sent), 10)
+        self.assertEqual(fake.max_in_flight, 3)
+
+    async def test_failing_item_isolated(self):
+        """Test that one failing or invalid item doesn't affect the others."""
+        requests = [(17, 1, "ok"), (17, 1, "boom"), (4, 1, "bad codes"), (2, 1, "fine")]
+        fake = FakeAsyncOpenAI(failures={"17-1 | boom"})
+        client = MathProtocolClient(None, "model", "prompt", async_client=fake)
+
+        results = await client.execute_many(requests)
+
+        self.assertEqual(results[0], _expected("17-1 | ok"))
+        self.assertEqual(results[1]["error"], 500)
+        self.assertIn("rate limited", results[1]["message"])
+        self.assertEqual(results[2]["error"], MathProtocol.ERROR_INVALID_FORMAT)
+        self.assertEqual(results[3], _expected("2-1 | fine"))
+        # The invalid item never reached the provider
+        self.assertNotIn("4-1 | bad codes", fake.sent)
+
+    async def test_empty_request_list(self):
+        """Test that no requests give no results."""
+        client = MathProtocolClient(None, "model", "prompt", async_client=FakeAsyncOpenAI())
+        self.assertEqual(await client.execute_many([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
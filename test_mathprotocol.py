@@ -15,27 +15,25 @@ class TestMathProtocol:
         """Setup test fixtures."""
         self.protocol = MathProtocol()
     
-    def test_valid_input_validation(self):
+    @pytest.mark.parametrize("inp", [
+        "2-1 | Good product",
+        "17-2 | Hello World",
+        "3-1 | Long text here",
+        "5-1 | Bonjour"
+    ])
+    def test_valid_input_validation(self, inp):
         """Test that valid inputs pass validation."""
-        valid_inputs = [
-            "2-1 | Good product",
-            "17-2 | Hello World",
-            "3-1 | Long text here",
-            "5-1 | Bonjour"
-        ]
-        for inp in valid_inputs:
-            assert self.protocol.validate_input(inp), f"Failed on: {inp}"
+        assert self.protocol.validate_input(inp), f"Failed on: {inp}"
     
-    def test_invalid_input_validation(self):
+    @pytest.mark.parametrize("inp", [
+        "4-1 | Text",  # 4 is not prime in our set
+        "2-4 | Text",  # 4 is not Fibonacci
+        "Hello",  # Wrong format
+        "2-1-1 | Text"  # Too many dashes
+    ])
+    def test_invalid_input_validation(self, inp):
         """Test that invalid inputs fail validation."""
-        invalid_inputs = [
-            "4-1 | Text",  # 4 is not prime in our set
-            "2-4 | Text",  # 4 is not Fibonacci
-            "Hello",  # Wrong format
-            "2-1-1 | Text"  # Too many dashes
-        ]
-        for inp in invalid_inputs:
-            assert not self.protocol.validate_input(inp), f"Should have failed: {inp}"
+        assert not self.protocol.validate_input(inp), f"Should have failed: {inp}"
     
     def test_input_parsing(self):
         """Test input parsing."""
@@ -82,6 +80,14 @@ class TestMathProtocol:
         assert self.protocol.get_response_name(2) == "Positive"
         assert self.protocol.get_response_name(128) == "HighConf"
         assert self.protocol.get_response_name(999) is None
+    
+    def test_response_validation_batch(self):
+        """Test that batch validation matches per-response validation."""
+        responses = ["3-128", "3-128 | Text", "17-128 | Text", "16-128 | Text", "1024", ""]
+        tasks = [2, 2, 3, 3, 2, 2]
+        assert self.protocol.validate_response_batch(responses, tasks) == [
+            True, False, True, False, True, False
+        ]
 
 
 class TestMockLLM:
@@ -193,6 +199,14 @@ class TestProtocolRegistryV2:
         assert registry.get_parameter_name(89) == "MAX_PRECISION"
         assert "SUCCESS_BIT" in registry.get_response_flags(1)
 
+    def test_registry_defaults_valid(self):
+        """Defaults skip register_* validation, so check them against the protocol sets."""
+        from mathprotocol import registry
+        assert set(registry.tasks) <= MathProtocol.PRIMES
+        assert set(registry.parameters) <= MathProtocol.FIBONACCI
+        for power in registry.responses:
+            assert power > 0 and (power & (power - 1)) == 0
+
     def test_dynamic_registration(self):
         """Test the new V2 ability to register custom protocols."""
         from mathprotocol import registry
@@ -256,6 +270,19 @@ class TestProtocolRegistryV2:
         assert "DATA_END" in prompt
         assert "What is AI?" in prompt
 
+    def test_construct_prompt_renders_arguments_as_given(self):
+        """Test that memoized prompt parts never leak between equal values."""
+        self.protocol.construct_prompt(17, [1, 2], "x")
+        assert "PARAM_FIB: [1.0, 2]" in self.protocol.construct_prompt(17, [1.0, 2], "x")
+        self.protocol.construct_prompt(True, [1], "x")
+        assert "TASK_PRIME: 1\n" in self.protocol.construct_prompt(1, [1], "x")
+        # Unhashable values and other containers render uncached, as given
+        class Unhashable(int):
+            __hash__ = None
+        prompt = self.protocol.construct_prompt(17, [Unhashable(2)], "x")
+        assert "PARAM_FIB: [2]" in prompt and "CHECKSUM: 34" in prompt
+        assert "PARAM_FIB: (1, 2)" in self.protocol.construct_prompt(17, (1, 2), "x")
+
     def test_response_flags_bitwise(self):
         """Test that response flags are correctly extracted."""
         from mathprotocol import registry
@@ -281,6 +308,26 @@ class TestProtocolRegistryV2:
         with pytest.raises(ValueError):
             registry.register_response(63, "INVALID_FLAG")
 
+    def test_response_flags_cache(self):
+        """Test that memoized flags track registrations and can't be mutated."""
+        from mathprotocol import registry
+        flags = registry.get_response_flags(1025)
+        assert flags == ["SUCCESS_BIT"]
+        flags.append("MUTATED")
+        assert registry.get_response_flags(1025) == ["SUCCESS_BIT"]
+
+        # Registering a new flag invalidates the cached decoding
+        registry.register_response(1024, "CUSTOM_FLAG")
+        assert registry.get_response_flags(1025) == ["SUCCESS_BIT", "CUSTOM_FLAG"]
+
+    def test_response_flags_batch(self):
+        """Test that batch decoding matches per-code decoding."""
+        from mathprotocol import registry
+        codes = [1, 5, 17, 0, 5, 4095, -1]
+        assert registry.get_response_flags_batch(codes) == [
+            registry.get_response_flags(code) for code in codes
+        ]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])